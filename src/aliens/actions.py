@@ -0,0 +1,6 @@
+# Player actions understood by AlienInvasion.step(); combine them with "|"
+NOOP = 0
+LEFT = 1
+RIGHT = 2
+FIRE = 4
+START = 8
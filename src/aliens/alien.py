@@ -1,39 +1,224 @@
-from pathlib import Path
+from functools import lru_cache
 
-import pygame
-from pygame.sprite import Sprite
+import numpy as np
 
-IMAGE_PATH = Path(__file__).parent / "assets" / "images" / "alien.bmp"
+from aliens.collision import SpatialHash
 
 
-class Alien(Sprite):
-    """A class to represent a single alien in the fleet."""
+def rect_round(values):
+    """Round positions the way pygame.Rect does (halves away from zero)."""
+    return np.copysign(np.floor(np.abs(values) + 0.5), values)
+
+
+@lru_cache(maxsize=8)
+def fleet_layout(
+    screen_width, screen_height, alien_width, alien_height, right_margin, bottom_margin
+):
+    """Return the left and top position of each alien in a new fleet.
+
+    Spacing between aliens is one alien width and one alien height, and the
+    fleet keeps a margin of right_margin alien widths to the right and
+    bottom_margin alien heights to the bottom of the screen. The layout only
+    depends on these sizes, so it is worked out once and the arrays are made
+    read-only to share them between fleets.
+    """
+    columns = np.arange(
+        alien_width, screen_width - right_margin * alien_width, 2 * alien_width
+    )
+    rows = np.arange(
+        alien_height, screen_height - bottom_margin * alien_height, 2 * alien_height
+    )
+    left, top = np.meshgrid(columns, rows)
+
+    left = left.ravel().astype(np.int64)
+    top = top.ravel().astype(np.int64)
+    left.flags.writeable = False
+    top.flags.writeable = False
+    return left, top
+
+
+class Fleet:
+    """A class to manage the fleet of aliens.
+
+    The aliens are stored as arrays of positions plus an alive mask, so that
+    moving and checking the fleet are single vectorized operations instead of
+    a pass over one sprite per alien.
+    """
 
     def __init__(self, ai_game):
-        """Initialize the alien and set its starting position."""
-        super().__init__()
+        """Initialize the fleet with no aliens in it."""
         self.screen = ai_game.screen
         self.settings = ai_game.settings
+        self.screen_rect = self.screen.get_rect()
+
+        # Every alien shares the theme's image and size
+        self.image = ai_game.theme.image("alien")
+        self.width, self.height = self.image.get_size()
 
-        # Load the alien image and set its rect attribute
-        self.image = pygame.image.load(IMAGE_PATH)
-        self.rect = self.image.get_rect()
+        # The exact horizontal position of each alien, its rect position, and
+        # whether it is still alive
+        self.x = np.zeros(0)
+        self.left = np.zeros(0, dtype=np.int64)
+        self.top = np.zeros(0, dtype=np.int64)
+        self.alive = np.zeros(0, dtype=bool)
 
-        # Add a padding to the left of the alien and above it
-        self.rect.x = self.rect.width
-        self.rect.y = self.rect.height
+        # Grid of the live aliens used to find collision candidates, with cells
+        # as big as the spacing between aliens. The whole fleet moves sideways
+        # together, so the grid only needs rebuilding when aliens drop or die;
+        # queries are shifted by how far the fleet has moved since.
+        self.grid = SpatialHash(2 * self.width, 2 * self.height)
+        self.grid_outdated = True
+        self.grid_shift = 0.0
+
+    def __len__(self):
+        """Return the number of aliens still alive."""
+        return int(np.count_nonzero(self.alive))
+
+    def create(self):
+        """Fill the screen with rows of aliens.
+
+        The layout comes from fleet_layout(); when it is the same size as the
+        last fleet, the arrays are reset in place.
+        """
+        left, top = fleet_layout(
+            self.settings.screen_width,
+            self.settings.screen_height,
+            self.width,
+            self.height,
+            self.settings.right_margin_multiplier,
+            self.settings.bottom_margin_multiplier,
+        )
+        if self.left.size != left.size:
+            self.x = np.empty(left.size)
+            self.left = np.empty_like(left)
+            self.top = np.empty_like(top)
+            self.alive = np.empty(left.size, dtype=bool)
+
+        np.copyto(self.left, left)
+        np.copyto(self.top, top)
+        np.copyto(self.x, left)
+        self.alive[:] = True
+        self.grid_outdated = True
+
+    def empty(self):
+        """Remove every alien from the fleet."""
+        self.alive[:] = False
+        self.grid_outdated = True
+
+    def check_edges(self):
+        """Return True if any alien is at an edge of the screen."""
+        at_edge = (self.left + self.width >= self.screen_rect.right) | (self.left <= 0)
+        return bool(np.any(at_edge & self.alive))
 
-        # Store the alien's exact horizontal position
-        self.x = float(self.rect.x)
+    def change_direction(self):
+        """Drop the entire fleet and change the fleet's direction."""
+        self.top += self.settings.fleet_drop_speed
+        self.settings.fleet_direction *= -1
+        self.grid_outdated = True
 
     def update(self):
-        """Move the alien right or left."""
+        """Turn the fleet around at an edge, then move it right or left."""
+        if self.check_edges():
+            self.change_direction()
         self.x += self.settings.alien_speed * self.settings.fleet_direction
-        self.rect.x = self.x
+        self.left[:] = rect_round(self.x)
+        self.grid_shift += self.settings.alien_speed * self.settings.fleet_direction
 
-    def check_edges(self):
-        """Return True if alien is at edge of screen."""
-        screen_rect = self.screen.get_rect()
-        if self.rect.right >= screen_rect.right or self.rect.left <= 0:
-            return True
-        return False
+    def check_bottom(self):
+        """Return True if any alien has reached the bottom of the screen."""
+        at_bottom = self.top + self.height >= self.screen_rect.bottom
+        return bool(np.any(at_bottom & self.alive))
+
+    def _update_grid(self):
+        """Rebuild the grid if aliens dropped or died since it was built."""
+        if self.grid_outdated:
+            alive = np.flatnonzero(self.alive)
+            self.grid.build(
+                alive, self.left[alive], self.top[alive], self.width, self.height
+            )
+            self.grid_outdated = False
+            self.grid_shift = 0.0
+
+    def bounding_rect(self):
+        """Return a rect around the live aliens, or None if there are none.
+
+        The rect can be a couple of pixels wider than the aliens themselves.
+        """
+        self._update_grid()
+        if self.grid.bounds is None:
+            return None
+        return self.grid.bounds.move(round(self.grid_shift), 0).inflate(4, 0)
+
+    def _overlapping(self, left, top, width, height):
+        """Find the live aliens overlapping each of a set of rects.
+
+        left and top are arrays with the position of each rect, and all the
+        rects are width x height. Return two arrays pairing the number of a
+        rect with the index of an alien, ordered by rect.
+        """
+        # Only the aliens sharing a grid cell with a rect need an exact test.
+        # Each alien rounds its own position, so allow a couple of pixels of
+        # slack around the shifted query.
+        self._update_grid()
+        shift = round(self.grid_shift)
+        rects, aliens = self.grid.query(left - shift - 2, top, width + 4, height)
+
+        alien_left = self.left[aliens]
+        alien_top = self.top[aliens]
+        overlapping = (
+            self.alive[aliens]
+            & (alien_left < left[rects] + width)
+            & (alien_left + self.width > left[rects])
+            & (alien_top < top[rects] + height)
+            & (alien_top + self.height > top[rects])
+        )
+        return rects[overlapping], aliens[overlapping]
+
+    def _colliding(self, rect):
+        """Return the indices of the live aliens that overlap rect.
+
+        rect can be no bigger than the spacing between aliens.
+        """
+        bounds = self.bounding_rect()
+        if bounds is None or not bounds.colliderect(rect):
+            return np.zeros(0, dtype=np.int64)
+        _, aliens = self._overlapping(
+            np.array([rect.x]), np.array([rect.y]), rect.width, rect.height
+        )
+        return np.unique(aliens)
+
+    def collide_rect(self, rect):
+        """Return True if any alien overlaps rect."""
+        return self._colliding(rect).size > 0
+
+    def hit(self, left, top, width, height):
+        """Destroy the aliens hit by a sequence of width x height rects.
+
+        Like groupcollide, the rects are checked in order and each one only
+        hits the aliens left by the rects before it. Return a mask of the rects
+        that hit anything, and the indices of the aliens destroyed.
+        """
+        rects, aliens = self._overlapping(left, top, width, height)
+        hit = np.zeros(left.size, dtype=bool)
+        if aliens.size == 0:
+            return hit, aliens
+
+        # Each alien goes to the first rect that overlaps it
+        aliens, first = np.unique(aliens, return_index=True)
+        hit[rects[first]] = True
+        self.alive[aliens] = False
+        self.grid_outdated = True
+        return hit, aliens
+
+    def draw(self, screen, area=None):
+        """Draw the live aliens to the screen, or only those overlapping area."""
+        shown = self.alive
+        if area is not None:
+            shown = shown & (
+                (self.left < area.right)
+                & (self.left + self.width > area.left)
+                & (self.top < area.bottom)
+                & (self.top + self.height > area.top)
+            )
+        positions = zip(self.left[shown].tolist(), self.top[shown].tolist())
+        screen.blits([(self.image, position) for position in positions], False)
@@ -1,67 +1,254 @@
+import os
+import sqlite3
 import sys
-from time import sleep
+from time import perf_counter
 
+import numpy as np
 import pygame
 
-from aliens.alien import Alien
-from aliens.bullet import Bullet
+from aliens.actions import FIRE, LEFT, NOOP, RIGHT, START
+from aliens.alien import Fleet
+from aliens.bullet import BulletPool
 from aliens.button import Button
+from aliens.capture import FrameCapture
+from aliens.control import ControlServer
 from aliens.game_stats import GameStats
+from aliens.leaderboard import Leaderboard
+from aliens.particles import ParticleSystem
+from aliens.profiler import (
+    ALIENS,
+    BULLETS,
+    COLLISIONS,
+    EVENTS,
+    PARTICLES,
+    SCREEN,
+    SHIP,
+    WAIT,
+    FrameProfiler,
+)
+from aliens.renderer import DirtyRenderer
 from aliens.scoreboard import Scoreboard
 from aliens.settings import Settings
 from aliens.ship import Ship
+from aliens.snapshot import restore_snapshot, take_snapshot
+from aliens.sound import ALIEN_DESTROYED, LEVEL_UP, SHIP_HIT, SHOT, SoundEffects
+from aliens.telemetry import FIRED, HIT, SHIP_LOST, Telemetry
+from aliens.theme import get_theme, theme_names
 
 
 class AlienInvasion:
     """Overall class to manage game assets and behavior."""
 
-    def __init__(self):
-        """Initialize the game, and create game resources."""
-        pygame.init()
+    def __init__(
+        self, screen_size=None, headless=False, settings=None, record_scores=True
+    ):
+        """Initialize the game, and create game resources.
+
+        By default the game runs fullscreen, drawn at settings.logical_size and
+        scaled to fit the display. Pass screen_size to use a window of that
+        size instead, and headless=True to
+        simulate the game off-screen with step(). settings replaces the default
+        Settings. Pass record_scores=False to keep the games played off the
+        leaderboard and out of telemetry.
+        """
+        # Time the start of the game, up to the first frame
+        self.started = perf_counter()
+        self.startup_time = None
+
+        # Start only the pygame modules in use, rather than every module with
+        # pygame.init(); the scoreboard and button need fonts even headless
+        self.headless = headless
+        if not headless:
+            pygame.display.init()
+        pygame.font.init()
 
         # Initialize the game clock
         self.clock = pygame.time.Clock()
         # Game Settings
-        self.settings = Settings()
+        self.settings = settings if settings is not None else Settings()
         # Game Window
-        self.screen = pygame.display.set_mode((0, 0), pygame.FULLSCREEN)
+        self.screen = self._create_screen(screen_size)
 
-        # Update screen width and height based on the fullscreen mode
+        # Update screen width and height based on the actual screen size
         self.settings.screen_width = self.screen.get_rect().width
         self.settings.screen_height = self.screen.get_rect().height
 
-        pygame.display.set_caption("Alien Invasion")
+        if not headless:
+            pygame.display.set_caption("Alien Invasion")
+
+        # Palette, font, and sprites the game is drawn with
+        self._load_theme(self.settings.theme)
+
+        # Scores of every game played on this machine; headless games are
+        # simulations, and don't count
+        self.record_scores = record_scores and not headless
+        self.leaderboard = None
+        if self.record_scores:
+            try:
+                self.leaderboard = Leaderboard()
+            except (OSError, sqlite3.Error) as error:
+                # Play on without one, e.g. when the data folder is read-only
+                print(f"Couldn't open the leaderboard: {error}", file=sys.stderr)
 
         # Create an instance to store game statistics, and create a scoreboard
         self.stats = GameStats(self)
         self.sb = Scoreboard(self)
 
+        # Sound effects, prepared now so playing them never waits on anything
+        self.sounds = SoundEffects(self)
+
         # Ship, bullets, and aliens
         self.ship = Ship(self)
-        self.bullets = pygame.sprite.Group()
-        self.aliens = pygame.sprite.Group()
+        self.bullets = BulletPool(self)
+        self.aliens = Fleet(self)
         self._create_fleet()
 
+        # Debris of the aliens and ships that blow up
+        self.particles = ParticleSystem(self)
+
         # Start Alien Invasion in an inactive state
         self.stats.game_active = False
 
+        # Ticks simulated so far, and ticks left in the pause after the ship
+        # is hit
+        self.ticks = 0
+        self.pause_ticks = 0
+
+        # Receives every input event handled, while a game is being recorded
+        self.recorder = None
+
         # Make the Play button
         self.play_button = Button(self, "Play")
 
+        # Timing of each phase of a frame, shown while profiling is on
+        self.profiler = FrameProfiler(self)
+
+        # Renderer that only redraws what changed, if it's enabled
+        self.renderer = DirtyRenderer(self)
+
+        # Save every frame to the file named by ALIENS_CAPTURE, if it's set
+        self.capture = None
+        capture_path = os.environ.get("ALIENS_CAPTURE")
+        if capture_path and not headless:
+            self.capture = FrameCapture(
+                self,
+                capture_path,
+                self.settings.capture_buffers,
+                self.settings.capture_policy,
+                self.settings.capture_compress,
+            )
+
+        # Log each game to the folder named by ALIENS_TELEMETRY, if it's set
+        self.telemetry = Telemetry(self)
+
+        # Take actions from agents on the socket named by ALIENS_CONTROL
+        self.control = None
+        control_address = os.environ.get("ALIENS_CONTROL")
+        if control_address:
+            self.control = ControlServer(control_address)
+
     def run_game(self):
-        """Game loop for Alien Invasion."""
+        """Game loop for Alien Invasion.
+
+        The game is simulated in fixed ticks of 1 / tick_rate seconds, as many
+        as the time since the last frame calls for, and drawn once per frame.
+        When drawing can't keep up, frames are dropped instead of slowing the
+        game down, up to max_ticks_per_frame ticks per frame.
+        """
+        tick_time = 1 / self.settings.tick_rate
+        lag = 0.0
+        last_time = perf_counter()
         while True:
+            self.profiler.start_frame()
             self._handle_events()  # handle events
-            self._update_objects()  # update the game objects
+            self.profiler.mark(EVENTS)
+
+            # Catch the simulation up with the time that has passed
+            now = perf_counter()
+            elapsed = now - last_time
+            lag += elapsed
+            last_time = now
+            ticks = 0
+            while lag >= tick_time and ticks < self.settings.max_ticks_per_frame:
+                self._update_objects()  # update the game objects
+                lag -= tick_time
+                ticks += 1
+            if ticks == self.settings.max_ticks_per_frame:
+                # Too far behind to catch up; let the game slow down instead
+                lag = min(lag, tick_time)
+            self.telemetry.frame(ticks, elapsed)
+
+            if self.control is not None:
+                self.control.publish(self.snapshot())
+
             self._update_screen()  # update the screen
-            self.clock.tick(self.settings.fps)  # set the frame rate
+            self.profiler.mark(SCREEN)
+            self.clock.tick(self.settings.fps)  # cap the frame rate
+            self.profiler.mark(WAIT)
+
+    def step(self, actions=NOOP):
+        """Advance the game by a single tick and return the score gained.
+
+        actions is a combination of the flags in aliens.actions. Nothing is
+        drawn and the frame rate is not capped, so a headless game runs as fast
+        as the CPU allows.
+        """
+        self._apply_actions(actions)
+        score = self.stats.score
+        self._update_objects()
+        return self.stats.score - score
+
+    def snapshot(self):
+        """Return the state of the game as a compact blob of bytes.
+
+        The blob holds the positions of the ship, bullets, and aliens, the
+        dynamic settings, and the game statistics, so restore() can rewind
+        the game to this tick, for lookahead search or to recover from a
+        crash.
+        """
+        return take_snapshot(self)
+
+    def restore(self, blob):
+        """Put the game back in a state returned by snapshot()."""
+        restore_snapshot(self, blob)
+
+    def _apply_actions(self, actions):
+        """Respond to a combination of the flags in aliens.actions."""
+        if actions & START:
+            self._start_game()
+        self.ship.moving_left = bool(actions & LEFT)
+        self.ship.moving_right = bool(actions & RIGHT)
+        if actions & FIRE:
+            self._fire_bullet()
+
+    def _create_screen(self, screen_size):
+        """Create the surface the game is drawn on."""
+        if self.headless:
+            # An off-screen surface stands in for the display
+            if screen_size is None:
+                screen_size = (self.settings.screen_width, self.settings.screen_height)
+            return pygame.Surface(screen_size)
+        if screen_size is not None:
+            return pygame.display.set_mode(screen_size)
+        if self.settings.logical_size is not None:
+            # SDL scales the screen up to the display, and mouse positions
+            # back down to the screen
+            return pygame.display.set_mode(
+                self.settings.logical_size, pygame.FULLSCREEN | pygame.SCALED
+            )
+        return pygame.display.set_mode((0, 0), pygame.FULLSCREEN)
 
     def _handle_events(self):
         """Event Handler to respond to keypresses and mouse events."""
-        for event in pygame.event.get():
+        events = pygame.event.get()
+        if self.control is not None:
+            # Actions from agents arrive as key events
+            events += self.control.events()
+        for event in events:
+            if self.recorder is not None:
+                self.recorder.record(self.ticks, event)
             if event.type == pygame.QUIT:
-                self.stats.save_high_score()
-                sys.exit()
+                self._quit()
             elif event.type == pygame.KEYDOWN:
                 self._handle_keydown_events(event)
             elif event.type == pygame.KEYUP:
@@ -85,8 +272,60 @@ class AlienInvasion:
         elif event.key == pygame.K_p:
             self._start_game()
         elif event.key == pygame.K_q:
-            self.stats.save_high_score()
-            sys.exit()
+            self._quit()
+        elif event.key == pygame.K_F3:
+            self.profiler.toggle()
+        elif event.key == pygame.K_F4:
+            self._next_theme()
+
+    def _load_theme(self, name):
+        """Load the theme called name, and use its palette."""
+        # Headless games, such as tests and batch workers, read cached atlases
+        # but don't add to the player's data folder
+        self.theme = get_theme(name, self.settings, save=not self.headless)
+        self.settings.theme = name
+        self.settings.bg_color = self.theme.colors["background"]
+        self.settings.bullet_color = self.theme.colors["bullet"]
+
+    def set_theme(self, name):
+        """Switch to the theme called name, in or out of a game.
+
+        Sprites keep their sizes, so the game itself plays the same.
+        """
+        self._load_theme(name)
+        self.ship.image = self.theme.image("ship")
+        self.aliens.image = self.theme.image("alien")
+        self.bullets.color = self.settings.bullet_color
+        self.particles.set_colors(
+            self.theme.colors.get("explosion", self.settings.bullet_color)
+        )
+        self.sb = Scoreboard(self)
+        self.play_button = Button(self, "Play")
+
+        # Everything changed color, so draw the whole screen again
+        self.renderer.previous = None
+
+    def _next_theme(self):
+        """Switch to the next theme pack, in alphabetical order."""
+        names = theme_names()
+        if self.theme.name in names:
+            self.set_theme(names[(names.index(self.theme.name) + 1) % len(names)])
+        else:
+            self.set_theme(names[0])
+
+    def _quit(self):
+        """Save the score, profile, and capture, close the server, and exit."""
+        if self.stats.game_active:
+            self.stats.save_score()
+        if self.leaderboard is not None:
+            self.leaderboard.close()
+        self.telemetry.close()
+        self.profiler.dump()
+        if self.capture is not None:
+            self.capture.close()
+        if self.control is not None:
+            self.control.close()
+        sys.exit()
 
     def _handle_keyup_events(self, event):
         """Respond to key releases."""
@@ -97,39 +336,40 @@ class AlienInvasion:
 
     def _handle_mouse_events(self, event):
         """Respond to mouse events."""
-        if event.type == pygame.MOUSEBUTTONDOWN:
-            mouse_pos = pygame.mouse.get_pos()
-            if self._check_play_button(mouse_pos):
-                self._start_game()
+        if event.type == pygame.MOUSEBUTTONDOWN and self._check_play_button(event.pos):
+            self._start_game()
 
     def _update_ship(self):
         """Update the ship's position."""
         self.ship.update()
 
     def _fire_bullet(self):
-        """Create a new bullet and add it to the bullets group."""
-        if len(self.bullets) < self.settings.bullets_allowed:
-            new_bullet = Bullet(self)
-            self.bullets.add(new_bullet)
+        """Fire a new bullet if the limit hasn't been reached."""
+        if self.bullets.fire():
+            self.sounds.play(SHOT)
+            self.telemetry.event(FIRED, len(self.bullets))
 
     def _update_bullets(self):
         """Update position of bullets and get rid of old bullets."""
-        # Update bullet positions
-        self.bullets.update()  # calls the update method of each sprite in the group
-
-        # Get rid of bullets that have disappeared
-        for bullet in self.bullets.copy():
-            if bullet.rect.bottom <= 0:
-                self.bullets.remove(bullet)
+        self.bullets.update()
 
     def _handle_bullet_alien_collisions(self):
         """Respond to bullet-alien collisions."""
         # Remove any bullets and aliens that have collided
-        collisions = pygame.sprite.groupcollide(self.bullets, self.aliens, True, True)
-
-        if collisions:
-            for aliens in collisions.values():
-                self.stats.score += self.settings.alien_points * len(aliens)
+        aliens_hit = self.bullets.hit_aliens(self.aliens)
+
+        if aliens_hit.size:
+            self.sounds.play(ALIEN_DESTROYED)
+            self.particles.explode(
+                self.aliens.left[aliens_hit],
+                self.aliens.top[aliens_hit],
+                self.aliens.width,
+                self.aliens.height,
+                self.settings.particles_per_alien,
+            )
+            points = self.settings.alien_points * aliens_hit.size
+            self.telemetry.event(HIT, aliens_hit.size, points)
+            self.stats.score += points
             self.sb.prep_score()
             self.sb.check_high_score()
 
@@ -139,83 +379,47 @@ class AlienInvasion:
 
     def _create_fleet(self):
         """Create the fleet of aliens."""
-        # Create an alien and keep adding aliens until there's no room left
-        # Spacing between aliens is one alien width and one alien height
-        alien = Alien(self)
-        alien_width, alien_height = alien.rect.size
-        current_x, current_y = alien_width, alien_height
-
-        while current_y < (
-            self.settings.screen_height
-            - self.settings.bottom_margin_multiplier * alien_height
-        ):
-            while current_x < (
-                self.settings.screen_width
-                - self.settings.right_margin_multiplier * alien_width
-            ):
-                self._create_alien(current_x, current_y)
-                current_x += 2 * alien_width
-            # Finished a row; reset x value, and increment y value
-            current_x = alien_width
-            current_y += 2 * alien_height
-
-    def _create_alien(self, x_position, y_position):
-        """Create an alien and place it in the row."""
-        new_alien = Alien(self)
-        new_alien.x = x_position
-        new_alien.rect.x = x_position
-        new_alien.rect.y = y_position
-        self.aliens.add(new_alien)
-
-    def _check_fleet_edges(self):
-        """Check if any aliens have reached an edge."""
-        for alien in self.aliens.sprites():
-            if alien.check_edges():
-                return True
-        return False
-
-    def _change_fleet_direction(self):
-        """Drop the entire fleet and change the fleet's direction."""
-        for alien in self.aliens.sprites():
-            alien.rect.y += self.settings.fleet_drop_speed
-        self.settings.fleet_direction *= -1
+        self.aliens.create()
 
     def _update_aliens(self):
         """Check if the fleet is at an edge, then update positions."""
-        if self._check_fleet_edges():
-            self._change_fleet_direction()
         self.aliens.update()
 
     def _handle_ship_alien_collisions(self):
         """Respond to ship-alien collisions."""
-        # Look for alien-ship collisions
-        if pygame.sprite.spritecollideany(self.ship, self.aliens):
+        # Look for alien-ship collisions, then for aliens hitting the bottom
+        # of the screen; the ship is hit at most once a tick
+        if self.aliens.collide_rect(self.ship.rect):
             self._ship_hit()
-
-        # Look for aliens hitting the bottom of the screen
-        if self._check_aliens_bottom():
+        elif self.aliens.check_bottom():
             self._ship_hit()  # treat this the same as if the ship got hit
 
     def _ship_hit(self):
         """Respond to the ship being hit by an alien."""
+        self.sounds.play(SHIP_HIT)
+        self.telemetry.event(SHIP_LOST, self.stats.ships_left, self.stats.level)
+        ship = self.ship.rect
+        self.particles.explode(
+            np.array([ship.x]),
+            np.array([ship.y]),
+            ship.width,
+            ship.height,
+            self.settings.particles_per_ship,
+        )
         if self.stats.ships_left > 0:
             # Decrement ships_left, and update scoreboard
             self.stats.ships_left -= 1
             self.sb.prep_ships()
             self._reset_objects()
-            sleep(0.5)  # pause
+
+            # Pause the game for a moment; events are still handled meanwhile
+            self.pause_ticks = round(self.settings.hit_pause * self.settings.tick_rate)
         else:
-            self.stats.save_high_score()
             self.stats.game_active = False
-            pygame.mouse.set_visible(True)
-
-    def _check_aliens_bottom(self):
-        """Check if any aliens have reached the bottom of the screen."""
-        screen_rect = self.screen.get_rect()
-        for alien in self.aliens.sprites():
-            if alien.rect.bottom >= screen_rect.bottom:
-                return True
-        return False
+            self.stats.save_score()
+            self.telemetry.end()
+            if not self.headless:
+                pygame.mouse.set_visible(True)
 
     def _start_game(self):
         """Start a new game when the player presses 'p' or clicks the Play
@@ -233,9 +437,12 @@ class AlienInvasion:
 
             # Reset the game elements
             self._reset_objects()
+            self.pause_ticks = 0
+            self.telemetry.start()
 
             # Hide the mouse cursor
-            pygame.mouse.set_visible(False)
+            if not self.headless:
+                pygame.mouse.set_visible(False)
 
     def _reset_objects(self):
         """Reset the ship, the aliens, and remove the bullets."""
@@ -249,17 +456,30 @@ class AlienInvasion:
 
     def _update_objects(self):
         """Update the ship, bullets, and aliens if the game is active."""
-        if self.stats.game_active:
+        self.ticks += 1
+        if self.pause_ticks:
+            # The game is paused after the ship was hit
+            self.pause_ticks -= 1
+        elif self.stats.game_active:
             self._update_ship()
+            self.profiler.mark(SHIP)
             self._update_bullets()
+            self.profiler.mark(BULLETS)
             self._handle_bullet_alien_collisions()
+            self.profiler.mark(COLLISIONS)
             self._update_aliens()
+            self.profiler.mark(ALIENS)
             self._handle_ship_alien_collisions()
+            self.profiler.mark(COLLISIONS)
         else:
             # If the game is inactive, clear the aliens and bullets
             self.aliens.empty()
             self.bullets.empty()
 
+        # Debris keeps flying while the game is paused or over
+        self.particles.update()
+        self.profiler.mark(PARTICLES)
+
     def _start_new_level(self):
         """Start a new level."""
         # Destroy existing bullets and create new fleet
@@ -271,16 +491,34 @@ class AlienInvasion:
         # Increase level
         self.stats.level += 1
         self.sb.prep_level()
+        self.sounds.play(LEVEL_UP)
+        self.telemetry.level_up(self.stats.level)
 
     def _update_screen(self):
         """Update images on the screen, and flip to the new screen."""
+        # Render the score information that changed since the last frame
+        self.sb.prep_images()
+
+        if self.settings.dirty_rects:
+            self.renderer.update_screen()
+        else:
+            self._draw_screen()
+
+        # Hand the frame to the capture thread
+        if self.capture is not None:
+            self.capture.capture()
+
+        if self.startup_time is None:
+            self.startup_time = perf_counter() - self.started
+            self.profiler.startup_time = self.startup_time
+
+    def _draw_screen(self):
+        """Draw everything, and flip to the new screen."""
         self.screen.fill(self.settings.bg_color)
-        for bullet in self.bullets.sprites():
-            bullet.draw_bullet()
+        self.bullets.draw()
         self.ship.blitme()
-        self.aliens.draw(
-            self.screen
-        )  # calls the draw method for each alien in the group
+        self.aliens.draw(self.screen)
+        self.particles.draw()
 
         # Draw the score information
         self.sb.show_score()
@@ -292,6 +530,9 @@ class AlienInvasion:
         if not self.stats.game_active:
             self.play_button.draw_button()
 
+        # Draw the frame timings if profiling is on
+        self.profiler.draw()
+
         pygame.display.flip()  # make the most recently drawn screen visible
 
 
@@ -0,0 +1,21 @@
+import os
+import sys
+from pathlib import Path
+
+ASSETS_DIR = Path(__file__).parent / "assets"
+
+
+def data_dir():
+    """Return the folder to keep the player's data in.
+
+    ALIENS_DATA names the folder, if it's set.
+    """
+    if "ALIENS_DATA" in os.environ:
+        return Path(os.environ["ALIENS_DATA"])
+    if sys.platform == "win32":
+        base = Path(os.environ.get("APPDATA") or Path.home())
+    elif sys.platform == "darwin":
+        base = Path.home() / "Library" / "Application Support"
+    else:
+        base = Path(os.environ.get("XDG_DATA_HOME") or Path.home() / ".local/share")
+    return base / "aliens"
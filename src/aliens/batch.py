@@ -0,0 +1,237 @@
+"""Play many games of Alien Invasion across a pool of processes.
+
+Each game is played headless by a policy: a scripted bot, or a recorded
+game played back from a replay file. Run
+
+    python -m aliens.batch --policy hunter --games 200 --set alien_speed=2,3,4
+
+to play 200 games with each combination of the settings given, using one
+process per core, and print the final score, level reached, and ships lost
+for each policy and combination of settings.
+"""
+
+import argparse
+import itertools
+import json
+import os
+import random
+import statistics
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from aliens.actions import FIRE, LEFT, NOOP, RIGHT, START
+from aliens.alien_invasion import AlienInvasion
+from aliens.replay import load, parse_size, play
+from aliens.settings import Settings
+
+
+def idle(ai_game, rng):
+    """Never move or fire."""
+    return NOOP
+
+
+def random_player(ai_game, rng):
+    """Move and fire at random."""
+    return rng.choice((NOOP, LEFT, RIGHT)) | (FIRE if rng.random() < 0.3 else NOOP)
+
+
+def hunter(ai_game, rng):
+    """Chase the lowest alien and fire whenever one is overhead."""
+    fleet = ai_game.aliens
+    alive = np.flatnonzero(fleet.alive)
+    if alive.size == 0:
+        return NOOP
+
+    # Aim at the lowest row, at the alien nearest the ship
+    ship_x = ai_game.ship.rect.centerx
+    lowest = alive[fleet.top[alive] == fleet.top[alive].max()]
+    centers = fleet.left[lowest] + fleet.width // 2
+    target = int(centers[np.abs(centers - ship_x).argmin()])
+
+    # Wobble a little so games with different seeds play out differently
+    target += rng.randint(-fleet.width // 4, fleet.width // 4)
+    if target < ship_x - 5:
+        return LEFT | FIRE
+    if target > ship_x + 5:
+        return RIGHT | FIRE
+    return FIRE
+
+
+# Scripted players by name; each one returns the actions for the next tick
+POLICIES = {"idle": idle, "random": random_player, "hunter": hunter}
+
+
+def _result(ai_game, over):
+    """Return the score, level, and ships lost of a finished game."""
+    stats = ai_game.stats
+    ships_lost = ai_game.settings.ship_limit - stats.ships_left + (1 if over else 0)
+    return {
+        "score": stats.score,
+        "level": stats.level,
+        "ships_lost": ships_lost,
+        "ticks": ai_game.ticks,
+    }
+
+
+def play_game(policy, seed, overrides, screen_size, max_ticks):
+    """Play one headless game and return its result.
+
+    policy is the name of a scripted player, or "replay:PATH" to play back a
+    recorded game with its own settings. The game ends when the last ship is
+    lost, or after max_ticks ticks.
+    """
+    if policy.startswith("replay:"):
+        replay = load(policy.removeprefix("replay:"))
+        ai_game = play(replay, headless=True)
+        return _result(ai_game, not ai_game.stats.game_active)
+
+    player = POLICIES[policy]
+    rng = random.Random(seed)
+    ai_game = AlienInvasion(screen_size, headless=True, settings=Settings(**overrides))
+    ai_game.step(START)
+    while ai_game.stats.game_active and ai_game.ticks < max_ticks:
+        ai_game.step(player(ai_game, rng))
+    return _result(ai_game, not ai_game.stats.game_active)
+
+
+def _play_task(task):
+    """Unpack a task for the process pool and play its game."""
+    return task[:3], play_game(*task)
+
+
+def _parse_overrides(assignments):
+    """Turn NAME=VALUE[,VALUE...] strings into every combination of values.
+
+    Values are read as JSON where possible, and as strings otherwise.
+    """
+
+    def value(text):
+        try:
+            return json.loads(text)
+        except json.JSONDecodeError:
+            return text
+
+    names, choices = [], []
+    for assignment in assignments:
+        name, _, values = assignment.partition("=")
+        if not hasattr(Settings(), name):
+            raise ValueError(f"{name!r} is not a setting")
+        names.append(name)
+        choices.append([value(text) for text in values.split(",")])
+    return [
+        dict(zip(names, combination)) for combination in itertools.product(*choices)
+    ]
+
+
+def summarize(results):
+    """Aggregate game results by policy and settings.
+
+    results is an iterable of ((policy, seed, overrides), result) pairs.
+    Return one row per policy and combination of settings.
+    """
+    groups = {}
+    for (policy, _, overrides), result in results:
+        key = (policy, json.dumps(overrides, sort_keys=True))
+        groups.setdefault(key, []).append(result)
+
+    rows = []
+    for (policy, overrides), games in groups.items():
+        scores = [game["score"] for game in games]
+        rows.append(
+            {
+                "policy": policy,
+                "settings": json.loads(overrides),
+                "games": len(games),
+                "mean_score": statistics.fmean(scores),
+                "median_score": statistics.median(scores),
+                "max_score": max(scores),
+                "mean_level": statistics.fmean(game["level"] for game in games),
+                "mean_ships_lost": statistics.fmean(g["ships_lost"] for g in games),
+                "mean_ticks": statistics.fmean(game["ticks"] for game in games),
+            }
+        )
+    return rows
+
+
+def _report(rows):
+    """Print a table of aggregated results."""
+    print(
+        f"{'policy':<12}{'games':>6}{'mean score':>12}{'median':>12}{'max':>12}"
+        f"{'level':>7}{'lost':>6}{'ticks':>9}  settings"
+    )
+    for row in rows:
+        settings = " ".join(
+            f"{name}={value}" for name, value in row["settings"].items()
+        )
+        print(
+            f"{row['policy'][:12]:<12}{row['games']:>6}{row['mean_score']:>12.6g}"
+            f"{row['median_score']:>12.6g}{row['max_score']:>12.6g}"
+            f"{row['mean_level']:>7.2f}{row['mean_ships_lost']:>6.2f}"
+            f"{row['mean_ticks']:>9.0f}  {settings}"
+        )
+
+
+def main(argv=None):
+    """Run a batch of games from the command line."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--policy",
+        action="append",
+        help=f"{', '.join(POLICIES)}, or replay:PATH; repeat to compare several",
+    )
+    parser.add_argument("--games", type=int, default=10, help="games per combination")
+    parser.add_argument("--seed", type=int, default=0, help="seed of the first game")
+    parser.add_argument(
+        "--max-ticks", type=int, default=36_000, help="ticks before a game is cut off"
+    )
+    parser.add_argument(
+        "--size",
+        type=parse_size,
+        default=(1200, 800),
+        help="screen size as WIDTHxHEIGHT",
+    )
+    parser.add_argument(
+        "--set",
+        action="append",
+        default=[],
+        metavar="NAME=VALUE[,VALUE...]",
+        help="override a setting; several values sweep over them",
+    )
+    parser.add_argument(
+        "--workers", type=int, default=os.cpu_count(), help="processes to use"
+    )
+    parser.add_argument("--json", metavar="PATH", help="also write the report as JSON")
+    args = parser.parse_args(argv)
+
+    policies = args.policy or ["hunter"]
+    for policy in policies:
+        if policy not in POLICIES and not policy.startswith("replay:"):
+            parser.error(f"unknown policy {policy!r}")
+    try:
+        sweep = _parse_overrides(args.set)
+    except ValueError as error:
+        parser.error(str(error))
+
+    # Replays are played with the settings they were recorded with
+    tasks = [
+        (policy, args.seed + game, overrides, args.size, args.max_ticks)
+        for policy in policies
+        for overrides in (sweep if policy in POLICIES else [{}])
+        for game in range(args.games)
+    ]
+    with ProcessPoolExecutor(max_workers=args.workers) as executor:
+        chunksize = max(1, len(tasks) // (4 * args.workers))
+        results = list(executor.map(_play_task, tasks, chunksize=chunksize))
+
+    rows = summarize(results)
+    _report(rows)
+    if args.json:
+        with open(args.json, "w") as file:
+            json.dump(rows, file, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
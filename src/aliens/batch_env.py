@@ -0,0 +1,416 @@
+"""Simulate many games of Alien Invasion in lockstep.
+
+BatchEnv holds the state of K headless games in NumPy arrays and advances
+all of them with one vectorized step, following the same rules as
+AlienInvasion.step(). Run
+
+    python -m aliens.batch_env [--games K] [--ticks N]
+
+to check the batch against K single games playing the same random actions,
+and to time it.
+"""
+
+import argparse
+import sys
+from time import perf_counter
+
+import numpy as np
+
+from aliens.actions import FIRE, LEFT, RIGHT, START
+from aliens.alien import fleet_layout, rect_round
+from aliens.settings import Settings
+
+
+class BatchEnv:
+    """A class to play K games of Alien Invasion at once.
+
+    Each attribute is an array with a row per game: the ship's position,
+    the aliens of the fleet, the bullets in flight in the order they were
+    fired, the dynamic settings, and the game statistics. Games start
+    inactive, like a new AlienInvasion, until they get the START action.
+    """
+
+    def __init__(self, k, screen_size=(1200, 800), settings=None):
+        """Create k games on screens of screen_size."""
+        self.k = k
+        self.settings = settings if settings is not None else Settings()
+        self.settings.screen_width, self.settings.screen_height = screen_size
+        settings = self.settings
+
+        # Sizes of the sprites, which the single game scales its theme's to
+        self.ship_width, self.ship_height = settings.ship_size
+        self.alien_width, self.alien_height = settings.alien_size
+        self.bullet_width = settings.bullet_width
+        self.bullet_height = settings.bullet_height
+
+        # Where a new fleet and a centered ship start out
+        self.layout_left, self.layout_top = fleet_layout(
+            settings.screen_width,
+            settings.screen_height,
+            self.alien_width,
+            self.alien_height,
+            settings.right_margin_multiplier,
+            settings.bottom_margin_multiplier,
+        )
+        self.ship_start = settings.screen_width // 2 - self.ship_width // 2
+        self.ship_top = settings.screen_height - self.ship_height
+        self.hit_pause = round(settings.hit_pause * settings.tick_rate)
+
+        # Starting values of the dynamic settings
+        settings.initialize_dynamic_settings()
+        self.start_values = (
+            settings.ship_speed,
+            settings.bullet_speed,
+            settings.alien_speed,
+            settings.alien_points,
+            settings.fleet_direction,
+        )
+
+        # Ship
+        self.ship_x = np.full(k, float(self.ship_start))
+        self.ship_left = np.full(k, self.ship_start, dtype=np.int64)
+
+        # Fleet, with a column per alien
+        aliens = self.layout_left.size
+        self.alien_x = np.zeros((k, aliens))
+        self.alien_left = np.zeros((k, aliens), dtype=np.int64)
+        self.alien_top = np.zeros((k, aliens), dtype=np.int64)
+        self.alive = np.zeros((k, aliens), dtype=bool)
+
+        # Bullets, with a column per slot; the first count slots are in flight
+        capacity = settings.bullets_allowed
+        self.bullet_left = np.zeros((k, capacity), dtype=np.int64)
+        self.bullet_y = np.zeros((k, capacity))
+        self.bullet_top = np.zeros((k, capacity), dtype=np.int64)
+        self.bullet_count = np.zeros(k, dtype=np.int64)
+
+        # Dynamic settings
+        self.ship_speed = np.full(k, settings.ship_speed)
+        self.bullet_speed = np.full(k, settings.bullet_speed)
+        self.alien_speed = np.full(k, settings.alien_speed)
+        self.alien_points = np.full(k, settings.alien_points, dtype=np.int64)
+        self.fleet_direction = np.full(k, settings.fleet_direction, dtype=np.int64)
+
+        # Game statistics
+        self.active = np.zeros(k, dtype=bool)
+        self.ships_left = np.full(k, settings.ship_limit, dtype=np.int64)
+        self.score = np.zeros(k, dtype=np.int64)
+        self.level = np.ones(k, dtype=np.int64)
+        self.pause_ticks = np.zeros(k, dtype=np.int64)
+        self.ticks = 0
+
+        # Every game starts with a fleet, like a new AlienInvasion
+        self._create_fleet(np.ones(k, dtype=bool))
+
+    def step(self, actions):
+        """Advance every game by a single tick.
+
+        actions is an array of shape (k,) holding a combination of the flags
+        in aliens.actions for each game. Return the observations, the score
+        each game gained, and which games ended on this tick.
+        """
+        actions = np.asarray(actions)
+        start = (actions & START) != 0
+        if start.any():
+            self._start_games(start & ~self.active)
+        moving_left = (actions & LEFT) != 0
+        moving_right = (actions & RIGHT) != 0
+        self._fire_bullets((actions & FIRE) != 0)
+
+        active = self.active.copy()
+        score = self.score.copy()
+        self._update_objects(moving_left, moving_right)
+        return self.observe(), self.score - score, active & ~self.active
+
+    def observe(self):
+        """Return a compact observation of every game, as float32.
+
+        Each row holds whether the game is active, the ship's position, how far
+        the fleet has moved sideways and down, the fleet direction, how full
+        the bullet pool is, and then whether each alien is alive.
+        """
+        settings = self.settings
+        return np.hstack(
+            (
+                np.stack(
+                    (
+                        self.active,
+                        self.ship_left / settings.screen_width,
+                        (self.alien_left[:, 0] - self.layout_left[0])
+                        / settings.screen_width,
+                        (self.alien_top[:, 0] - self.layout_top[0])
+                        / settings.screen_height,
+                        self.fleet_direction,
+                        self.bullet_count / self.bullet_left.shape[1],
+                    ),
+                    axis=1,
+                ),
+                self.alive,
+            )
+        ).astype(np.float32)
+
+    def _start_games(self, games):
+        """Start a new game in each of games, like _start_game()."""
+        ship_speed, bullet_speed, alien_speed, alien_points, direction = (
+            self.start_values
+        )
+        self.ship_speed[games] = ship_speed
+        self.bullet_speed[games] = bullet_speed
+        self.alien_speed[games] = alien_speed
+        self.alien_points[games] = alien_points
+        self.fleet_direction[games] = direction
+
+        self.ships_left[games] = self.settings.ship_limit
+        self.score[games] = 0
+        self.level[games] = 1
+        self.active |= games
+
+        self._reset_objects(games)
+        self.pause_ticks[games] = 0
+
+    def _reset_objects(self, games):
+        """Remove the bullets, create a new fleet, and center the ship."""
+        self.bullet_count[games] = 0
+        self._create_fleet(games)
+        self.ship_left[games] = self.ship_start
+        self.ship_x[games] = self.ship_start
+
+    def _create_fleet(self, games):
+        """Put a new fleet in each of games."""
+        self.alien_x[games] = self.layout_left
+        self.alien_left[games] = self.layout_left
+        self.alien_top[games] = self.layout_top
+        self.alive[games] = True
+
+    def _fire_bullets(self, games):
+        """Fire a bullet from the ship in each of games that has room for one."""
+        games = np.flatnonzero(games & (self.bullet_count < self.bullet_left.shape[1]))
+        slots = self.bullet_count[games]
+        centerx = self.ship_left[games] + self.ship_width // 2
+        self.bullet_left[games, slots] = centerx - self.bullet_width // 2
+        self.bullet_y[games, slots] = self.ship_top
+        self.bullet_top[games, slots] = self.ship_top
+        self.bullet_count[games] += 1
+
+    def _keep_bullets(self, keep):
+        """Keep only the bullets where keep is True, in the same order."""
+        order = np.argsort(~keep, axis=1, kind="stable")
+        for name in ("bullet_left", "bullet_y", "bullet_top"):
+            setattr(self, name, np.take_along_axis(getattr(self, name), order, 1))
+        self.bullet_count = np.count_nonzero(keep, axis=1)
+
+    def _in_flight(self):
+        """Return a mask of the bullet slots in flight."""
+        slots = np.arange(self.bullet_left.shape[1])
+        return slots < self.bullet_count[:, None]
+
+    def _update_objects(self, moving_left, moving_right):
+        """Update the games that are running, and clear the inactive ones."""
+        self.ticks += 1
+        paused = self.pause_ticks > 0
+        self.pause_ticks[paused] -= 1
+
+        inactive = ~self.active & ~paused
+        self.alive[inactive] = False
+        self.bullet_count[inactive] = 0
+
+        playing = self.active & ~paused
+        if playing.any():
+            self._update_ships(playing, moving_left, moving_right)
+            self._update_bullets(playing)
+            self._handle_bullet_alien_collisions(playing)
+            self._update_aliens(playing)
+            self._handle_ship_alien_collisions(playing)
+
+    def _update_ships(self, playing, moving_left, moving_right):
+        """Move the ships whose movement flags are set."""
+        screen_width = self.settings.screen_width
+        right = (
+            playing & moving_right & (self.ship_left + self.ship_width < screen_width)
+        )
+        left = playing & moving_left & (self.ship_left > 0)
+        self.ship_x = np.where(right, self.ship_x + self.ship_speed, self.ship_x)
+        self.ship_x = np.where(left, self.ship_x - self.ship_speed, self.ship_x)
+        self.ship_left = np.where(playing, rect_round(self.ship_x), self.ship_left)
+        self.ship_left = self.ship_left.astype(np.int64)
+
+    def _update_bullets(self, playing):
+        """Move the bullets up the screen and get rid of old bullets."""
+        moving = playing[:, None] & self._in_flight()
+        self.bullet_y -= np.where(moving, self.bullet_speed[:, None], 0.0)
+        self.bullet_top[moving] = rect_round(self.bullet_y[moving])
+
+        gone = moving & (self.bullet_top + self.bullet_height <= 0)
+        if gone.any():
+            self._keep_bullets(self._in_flight() & ~gone)
+
+    def _handle_bullet_alien_collisions(self, playing):
+        """Destroy the aliens hit by bullets, and score them.
+
+        Like groupcollide, each alien goes to the first bullet fired that
+        overlaps it, and every bullet that hit something is removed.
+        """
+        left = self.bullet_left[:, :, None]
+        top = self.bullet_top[:, :, None]
+        alien_left = self.alien_left[:, None, :]
+        alien_top = self.alien_top[:, None, :]
+        overlapping = (
+            (playing[:, None] & self._in_flight())[:, :, None]
+            & self.alive[:, None, :]
+            & (alien_left < left + self.bullet_width)
+            & (alien_left + self.alien_width > left)
+            & (alien_top < top + self.bullet_height)
+            & (alien_top + self.alien_height > top)
+        )
+        hit_aliens = overlapping.any(axis=1)
+        if hit_aliens.any():
+            games, aliens = np.nonzero(hit_aliens)
+            first = overlapping[games, :, aliens].argmax(axis=1)
+            hit_bullets = np.zeros_like(self._in_flight())
+            hit_bullets[games, first] = True
+
+            self.alive &= ~hit_aliens
+            self.score += self.alien_points * np.count_nonzero(hit_aliens, axis=1)
+            self._keep_bullets(self._in_flight() & ~hit_bullets)
+
+        # Start a new level in games whose fleet was destroyed
+        cleared = playing & ~self.alive.any(axis=1)
+        if cleared.any():
+            self._start_new_level(cleared)
+
+    def _start_new_level(self, games):
+        """Start a new level in each of games."""
+        self.bullet_count[games] = 0
+        self._create_fleet(games)
+
+        scale = self.settings.speedup_scale
+        self.ship_speed[games] *= scale
+        self.bullet_speed[games] *= scale
+        self.alien_speed[games] *= scale
+        points = self.alien_points[games] * self.settings.score_scale
+        self.alien_points[games] = points.astype(np.int64)
+        self.level[games] += 1
+
+    def _update_aliens(self, playing):
+        """Turn fleets around at an edge, then move them right or left."""
+        left = self.alien_left
+        at_edge = (left + self.alien_width >= self.settings.screen_width) | (left <= 0)
+        turning = playing & (at_edge & self.alive).any(axis=1)
+        self.alien_top[turning] += self.settings.fleet_drop_speed
+        self.fleet_direction[turning] *= -1
+
+        speed = np.where(playing, self.alien_speed * self.fleet_direction, 0.0)
+        self.alien_x += speed[:, None]
+        self.alien_left[playing] = rect_round(self.alien_x[playing])
+
+    def _handle_ship_alien_collisions(self, playing):
+        """Respond to aliens reaching a ship or the bottom of the screen."""
+        ship_left = self.ship_left[:, None]
+        touching = self.alive & (
+            (self.alien_left < ship_left + self.ship_width)
+            & (self.alien_left + self.alien_width > ship_left)
+            & (self.alien_top < self.ship_top + self.ship_height)
+            & (self.alien_top + self.alien_height > self.ship_top)
+        )
+        self._ship_hit(playing & touching.any(axis=1))
+
+        # Checked after any new fleets are in place, like the single game
+        bottom = self.alien_top + self.alien_height >= self.settings.screen_height
+        self._ship_hit(playing & (bottom & self.alive).any(axis=1))
+
+    def _ship_hit(self, games):
+        """Respond to the ship being hit in each of games."""
+        spare = games & (self.ships_left > 0)
+        self.ships_left[spare] -= 1
+        self._reset_objects(spare)
+        self.pause_ticks[spare] = self.hit_pause
+        self.active &= ~(games & ~spare)
+
+
+def cross_check(k=16, ticks=5000, screen_size=(1200, 800), seed=0):
+    """Play k single games and a BatchEnv with the same random actions.
+
+    Compare the state of every game after each tick, and return a list of
+    (tick, game, what) for each difference found.
+    """
+    from aliens.alien_invasion import AlienInvasion
+
+    rng = np.random.default_rng(seed)
+    games = [AlienInvasion(screen_size, headless=True) for _ in range(k)]
+    env = BatchEnv(k, screen_size)
+
+    differences = []
+    for tick in range(ticks):
+        # START is rare, so games get a chance to end
+        actions = rng.integers(0, 8, size=k)
+        actions |= np.where(rng.random(k) < 0.002, START, 0)
+        env.step(actions)
+        for number, game in enumerate(games):
+            game.step(int(actions[number]))
+            bullets = game.bullets
+            single = {
+                "score": game.stats.score,
+                "level": game.stats.level,
+                "ships_left": game.stats.ships_left,
+                "active": game.stats.game_active,
+                "ship": game.ship.rect.x,
+                "alive": game.aliens.alive.tolist(),
+                "aliens": (game.aliens.left.tolist(), game.aliens.top.tolist()),
+                "bullets": (
+                    bullets.left[: bullets.count].tolist(),
+                    bullets.top[: bullets.count].tolist(),
+                ),
+            }
+            count = env.bullet_count[number]
+            batch = {
+                "score": env.score[number],
+                "level": env.level[number],
+                "ships_left": env.ships_left[number],
+                "active": env.active[number],
+                "ship": env.ship_left[number],
+                "alive": env.alive[number].tolist(),
+                "aliens": (
+                    env.alien_left[number].tolist(),
+                    env.alien_top[number].tolist(),
+                ),
+                "bullets": (
+                    env.bullet_left[number, :count].tolist(),
+                    env.bullet_top[number, :count].tolist(),
+                ),
+            }
+            for what, value in single.items():
+                if value != batch[what]:
+                    differences.append((tick, number, what))
+    return differences
+
+
+def main(argv=None):
+    """Cross-check and time BatchEnv from the command line."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--games", type=int, default=1000, help="games to time")
+    parser.add_argument("--ticks", type=int, default=2000, help="ticks to time")
+    parser.add_argument(
+        "--check-ticks", type=int, default=5000, help="ticks to cross-check"
+    )
+    args = parser.parse_args(argv)
+
+    differences = cross_check(ticks=args.check_ticks)
+    for tick, game, what in differences[:10]:
+        print(f"tick {tick}, game {game}: {what} differs from the single game")
+    if not differences:
+        print(f"Matched 16 single games for {args.check_ticks} ticks")
+
+    rng = np.random.default_rng(0)
+    env = BatchEnv(args.games)
+    env.step(np.full(args.games, START))
+    actions = rng.integers(0, 8, size=(args.ticks, args.games))
+    start = perf_counter()
+    for tick_actions in actions:
+        env.step(tick_actions)
+    steps = args.games * args.ticks / (perf_counter() - start)
+    print(f"{steps:,.0f} game steps per second with {args.games} games")
+    return 1 if differences else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
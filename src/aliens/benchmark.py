@@ -0,0 +1,262 @@
+"""Benchmark Alien Invasion with scripted scenarios.
+
+Each scenario plays a fixed script of actions off-screen, using SDL's dummy
+video driver, and draws a frame after every tick. Run it with
+
+    python -m aliens.benchmark [--save results.json] [--baseline results.json]
+
+to report ticks per second, the median time of each phase of a frame, and
+the memory allocated while playing. The cold start, from launching Python
+to the first frame, is timed too, unless --no-startup is given. With
+--baseline, scenarios that got slower than the stored run by more than the
+threshold are reported and the exit status is 1.
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tracemalloc
+from time import perf_counter
+
+from aliens.actions import FIRE, LEFT, NOOP, RIGHT, START
+from aliens.profiler import EVENTS, PHASE_NAMES, SCREEN, FrameProfiler
+
+
+def _idle_menu(game, tick):
+    """Sit on the menu with the Play button showing."""
+    return NOOP
+
+
+def _sweep(game, tick):
+    """Start a game and sweep the ship from side to side without firing."""
+    if tick == 0:
+        return START
+    return LEFT if tick // 60 % 2 else RIGHT
+
+
+def _max_bullets(game, tick):
+    """Keep as many slow bullets in flight as the pool holds."""
+    if tick == 0:
+        game._apply_actions(START)
+        game.settings.bullets_allowed = 1000
+        game.settings.bullet_speed = 1.0
+    return FIRE | _sweep(game, tick + 1)
+
+
+def _level_progression(game, tick):
+    """Fire constantly and skip to a new level every 10 ticks.
+
+    The game doesn't speed up, so the fleet doesn't race to the bottom.
+    """
+    if tick == 0:
+        game._apply_actions(START)
+        game.settings.speedup_scale = 1.0
+    elif tick % 10 == 0:
+        game._start_new_level()
+    return FIRE | _sweep(game, tick)
+
+
+# Scenario name: (screen size, script returning the actions for each tick)
+SCENARIOS = {
+    "idle_menu": ((1200, 800), _idle_menu),
+    "fleet_1080p": ((1920, 1080), _sweep),
+    "fleet_4k": ((3840, 2160), _sweep),
+    "max_bullets": ((1920, 1080), _max_bullets),
+    "level_progression": ((1200, 800), _level_progression),
+}
+
+
+def _play(size, script, ticks, dirty_rects, profile):
+    """Play ticks ticks of a scenario and return the profiler and time taken."""
+    # Imported here so SDL sees the video driver chosen in main()
+    from aliens.alien_invasion import AlienInvasion
+
+    # Keep benchmark games off the player's leaderboard and telemetry
+    game = AlienInvasion(size, record_scores=False)
+    game.settings.dirty_rects = dirty_rects
+    profiler = game.profiler = FrameProfiler(game, frames=ticks)
+    profiler.enabled = profile
+
+    start = perf_counter()
+    for tick in range(ticks):
+        profiler.start_frame()
+        game._apply_actions(script(game, tick))
+        profiler.mark(EVENTS)
+        game._update_objects()
+        game._update_screen()
+        profiler.mark(SCREEN)
+    profiler.start_frame()
+    seconds = perf_counter() - start
+    return profiler, seconds
+
+
+def run_scenario(name, ticks=600, dirty_rects=False):
+    """Run a scenario and return its results as a dict.
+
+    The scenario is played three times: once to time it, once to record the
+    phases of each frame, and once under tracemalloc to measure memory, so
+    the instrumentation doesn't slow down the timed run.
+    """
+    size, script = SCENARIOS[name]
+    _, seconds = _play(size, script, ticks, dirty_rects, profile=False)
+    profiler, _ = _play(size, script, ticks, dirty_rects, profile=True)
+    phases = profiler.percentiles()[0]
+
+    tracemalloc.start()
+    try:
+        _play(size, script, ticks, dirty_rects, profile=False)
+        current, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {
+        "ticks_per_second": ticks / seconds,
+        "phase_p50_ms": dict(zip(PHASE_NAMES + ("frame",), phases.tolist())),
+        "retained_kib": current / 1024,
+        "peak_kib": peak / 1024,
+    }
+
+
+# Run in a fresh interpreter to time a cold start up to the first frame
+STARTUP_SCRIPT = """
+from time import perf_counter
+start = perf_counter()
+from aliens.alien_invasion import AlienInvasion
+game = AlienInvasion()
+game._update_screen()
+print(perf_counter() - start, game.startup_time)
+"""
+
+
+def measure_startup(runs=5):
+    """Return the median cold start time of the game as a dict.
+
+    Each run launches a new interpreter, so nothing is imported or cached
+    yet. startup_ms runs from the first import to the first frame, and
+    first_frame_ms from creating the game to the first frame.
+    """
+    totals = []
+    first_frames = []
+    for _ in range(runs):
+        output = subprocess.run(
+            [sys.executable, "-c", STARTUP_SCRIPT],
+            capture_output=True,
+            check=True,
+            text=True,
+            env={**os.environ, "PYGAME_HIDE_SUPPORT_PROMPT": "1"},
+        ).stdout
+        # The times are on the last line, after anything else printed
+        total, first_frame = output.splitlines()[-1].split()
+        totals.append(float(total) * 1000)
+        first_frames.append(float(first_frame) * 1000)
+    return {
+        "startup_ms": statistics.median(totals),
+        "first_frame_ms": statistics.median(first_frames),
+    }
+
+
+def compare(results, baseline, threshold):
+    """Return the scenarios that ran slower than baseline by over threshold."""
+    slower = []
+    for name, result in results.items():
+        if name not in baseline:
+            continue
+        if name == "startup":
+            ratio = baseline[name]["startup_ms"] / result["startup_ms"]
+        else:
+            ratio = result["ticks_per_second"] / baseline[name]["ticks_per_second"]
+        if ratio < 1 - threshold:
+            slower.append((name, ratio))
+    return slower
+
+
+def _report(results):
+    """Print a table of results."""
+    phases = (
+        "events",
+        "ship",
+        "bullets",
+        "collisions",
+        "aliens",
+        "particles",
+        "screen",
+    )
+    print(
+        f"{'scenario':<18}{'ticks/s':>9}"
+        + "".join(f"{phase[:9]:>10}" for phase in phases)
+        + f"{'peak KiB':>10}{'kept KiB':>10}"
+    )
+    for name, result in results.items():
+        if name == "startup":
+            continue
+        times = result["phase_p50_ms"]
+        print(
+            f"{name:<18}{result['ticks_per_second']:>9.0f}"
+            + "".join(f"{times[phase]:>10.3f}" for phase in phases)
+            + f"{result['peak_kib']:>10.0f}{result['retained_kib']:>10.0f}"
+        )
+    print("Phase times are medians in milliseconds per tick.")
+    if "startup" in results:
+        startup = results["startup"]
+        print(
+            f"Cold start: {startup['startup_ms']:.0f} ms to the first frame, "
+            f"{startup['first_frame_ms']:.0f} ms of it after the imports."
+        )
+
+
+def main(argv=None):
+    """Run the benchmarks from the command line."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("scenarios", nargs="*", help="scenarios to run (default: all)")
+    parser.add_argument("--ticks", type=int, default=600, help="ticks per run")
+    parser.add_argument(
+        "--dirty-rects", action="store_true", help="use the dirty-rect renderer"
+    )
+    parser.add_argument("--save", metavar="PATH", help="write results as JSON")
+    parser.add_argument(
+        "--baseline", metavar="PATH", help="compare with results saved earlier"
+    )
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=0.1,
+        help="slowdown that counts as a regression (default: 0.1)",
+    )
+    parser.add_argument(
+        "--no-startup", action="store_true", help="don't time the cold start"
+    )
+    args = parser.parse_args(argv)
+    for name in args.scenarios:
+        if name not in SCENARIOS:
+            parser.error(f"unknown scenario {name!r}, pick from {', '.join(SCENARIOS)}")
+
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+    results = {}
+    for name in args.scenarios or SCENARIOS:
+        results[name] = run_scenario(name, args.ticks, args.dirty_rects)
+    if not args.no_startup:
+        results["startup"] = measure_startup()
+    _report(results)
+
+    if args.save:
+        with open(args.save, "w") as file:
+            json.dump(results, file, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as file:
+            baseline = json.load(file)
+        slower = compare(results, baseline, args.threshold)
+        for name, ratio in slower:
+            print(f"{name} regressed: {ratio:.0%} of the baseline speed")
+        if slower:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,35 +1,119 @@
+import numpy as np
 import pygame
-from pygame.sprite import Sprite
 
+from aliens.alien import rect_round
 
-class Bullet(Sprite):
-    """A class to manage bullets fired from the ship."""
+
+class BulletPool:
+    """A class to manage bullets fired from the ship.
+
+    Bullets live in arrays with room for bullets_allowed of them. The first
+    count slots hold the bullets in flight, in the order they were fired;
+    firing fills the next slot and spent bullets are culled in place, so no
+    objects are created or thrown away while playing.
+    """
 
     def __init__(self, ai_game):
-        """Create a bullet object at the ship's current position."""
-        super().__init__()
+        """Create an empty pool of bullets."""
         self.screen = ai_game.screen
         self.settings = ai_game.settings
+        self.ship = ai_game.ship
         self.color = self.settings.bullet_color
+        self.width = self.settings.bullet_width
+        self.height = self.settings.bullet_height
 
-        # Create a bullet rect at (0, 0) and then set correct position
-        self.rect = pygame.Rect(
-            0, 0, self.settings.bullet_width, self.settings.bullet_height
-        )
-        self.rect.midtop = ai_game.ship.rect.midtop
+        # Left edge, exact vertical position, and top edge of each bullet
+        capacity = self.settings.bullets_allowed
+        self.left = np.zeros(capacity, dtype=np.int64)
+        self.y = np.zeros(capacity)
+        self.top = np.zeros(capacity, dtype=np.int64)
+        self.count = 0
+
+        # Scratch rect for placing and testing one bullet at a time
+        self.rect = pygame.Rect(0, 0, self.width, self.height)
+
+    def __len__(self):
+        """Return the number of bullets in flight."""
+        return self.count
+
+    def fire(self):
+        """Fire a bullet from the ship's current position, if one is allowed.
+
+        Return whether a bullet was fired.
+        """
+        if self.count >= self.settings.bullets_allowed:
+            return False
+        if self.count == self.y.size:
+            # bullets_allowed was raised after the pool was made
+            self._grow(self.settings.bullets_allowed)
 
-        # Store the bullet's position as a float
-        # NOTE: This is necessary because rect only stores integer values
-        self.y = float(self.rect.y)
+        # Start the bullet at the top center of the ship
+        self.rect.midtop = self.ship.rect.midtop
+        self.left[self.count] = self.rect.x
+        self.y[self.count] = self.rect.y
+        self.top[self.count] = self.rect.y
+        self.count += 1
+        return True
+
+    def _grow(self, capacity):
+        """Make room for capacity bullets, keeping the ones in flight."""
+        for name in ("left", "y", "top"):
+            array = getattr(self, name)
+            grown = np.zeros(capacity, dtype=array.dtype)
+            grown[: self.count] = array[: self.count]
+            setattr(self, name, grown)
+
+    def empty(self):
+        """Remove every bullet."""
+        self.count = 0
 
     def update(self):
-        """Move the bullet up the screen."""
-        # Update the exact position of the bullet
-        self.y -= self.settings.bullet_speed
+        """Move the bullets up the screen and get rid of old bullets."""
+        count = self.count
+        self.y[:count] -= self.settings.bullet_speed
+        self.top[:count] = rect_round(self.y[:count])
+
+        # Get rid of bullets that have disappeared
+        on_screen = self.top[:count] + self.height > 0
+        if not on_screen.all():
+            self._keep(on_screen)
+
+    def _keep(self, keep):
+        """Keep only the bullets where keep is True, in the same order."""
+        count = self.count
+        self.count = int(np.count_nonzero(keep))
+        self.left[: self.count] = self.left[:count][keep]
+        self.y[: self.count] = self.y[:count][keep]
+        self.top[: self.count] = self.top[:count][keep]
+
+    def hit_aliens(self, fleet):
+        """Remove the bullets that hit aliens, and destroy those aliens.
+
+        Like groupcollide, bullets are checked in the order they were fired,
+        and each one only hits the aliens left by the bullets before it.
+        Return the indices of the aliens destroyed.
+        """
+        if not self.count:
+            return np.zeros(0, dtype=np.int64)
+        hit, aliens_hit = fleet.hit(
+            self.left[: self.count], self.top[: self.count], self.width, self.height
+        )
+        if aliens_hit.size:
+            self._keep(~hit)
+        return aliens_hit
 
-        # Update the rect position
-        self.rect.y = self.y
+    def draw(self, rows=None):
+        """Draw the bullets to the screen, or only those numbered in rows.
 
-    def draw_bullet(self):
-        """Draw the bullet to the screen."""
-        pygame.draw.rect(self.screen, self.color, self.rect)
+        Each bullet is drawn through the scratch rect, so drawing creates no
+        rects.
+        """
+        left = self.left[: self.count]
+        top = self.top[: self.count]
+        if rows is not None:
+            left = left[rows]
+            top = top[rows]
+        rect = self.rect
+        for position in zip(left.tolist(), top.tolist()):
+            rect.topleft = position
+            pygame.draw.rect(self.screen, self.color, rect)
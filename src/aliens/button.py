@@ -1,6 +1,6 @@
-import pygame.font
+import pygame
 
-from aliens.colors import RED, GREEN
+from aliens.text import get_text_cache
 
 
 class Button:
@@ -11,9 +11,9 @@ class Button:
 
         # Set the dimensions and properties of the button
         self.width, self.height = 200, 50
-        self.button_color = RED
-        self.text_color = GREEN
-        self.font = pygame.font.SysFont(None, 48)
+        self.button_color = ai_game.theme.colors["button"]
+        self.text_color = ai_game.theme.colors["button_text"]
+        self.text = get_text_cache(48, ai_game.theme.font)
 
         # Build the button's rect object and center it
         self.rect = pygame.Rect(0, 0, self.width, self.height)
@@ -24,7 +24,7 @@ class Button:
 
     def _prep_msg(self, msg):
         """Turn msg into a rendered image and center text on the button."""
-        self.msg_image = self.font.render(msg, True, self.text_color, self.button_color)
+        self.msg_image = self.text.render(msg, self.text_color, self.button_color)
         self.msg_image_rect = self.msg_image.get_rect()
         self.msg_image_rect.center = self.rect.center
 
@@ -0,0 +1,125 @@
+import queue
+import struct
+import sys
+import threading
+import zlib
+
+import numpy as np
+import pygame
+
+MAGIC = b"AIFC"
+
+# Magic, frame width and height, and whether frames are compressed
+HEADER = struct.Struct("<4sHH?")
+
+# Frame number and the length of the frame data that follows
+FRAME = struct.Struct("<II")
+
+
+class FrameCapture:
+    """A class to save every frame of the game to disk without slowing it.
+
+    Each frame is copied into one of a few preallocated buffers and handed
+    to a writer thread through a bounded queue. Frames are stored as rows of
+    RGB bytes, each preceded by its frame number, so a gap in the numbers
+    shows where frames were dropped. When every buffer is waiting to be
+    written, the "drop" policy skips the frame, and the "block" policy waits
+    for the writer to free a buffer. If writing fails, e.g. because the
+    disk is full, capturing stops and the game carries on.
+    """
+
+    def __init__(self, ai_game, path, buffers=4, policy="drop", compress=False):
+        """Open path and start the writer thread."""
+        if policy not in ("drop", "block"):
+            raise ValueError(f"unknown frame-drop policy {policy!r}")
+        self.screen = ai_game.screen
+        self.policy = policy
+        self.compress = compress
+        width, height = self.screen.get_size()
+
+        # Buffers ready to be filled, and filled buffers waiting to be written
+        self.free = queue.Queue()
+        for _ in range(buffers):
+            self.free.put(np.zeros((height, width, 3), dtype=np.uint8))
+        self.filled = queue.Queue(maxsize=buffers)
+
+        # Frames captured and frames dropped so far, and whether writing failed
+        self.frames = 0
+        self.dropped = 0
+        self.failed = False
+
+        # Closed by close(), once the writer thread is done with it
+        self.file = open(path, "wb")  # noqa: SIM115
+        self.file.write(HEADER.pack(MAGIC, width, height, compress))
+        self.writer = threading.Thread(target=self._write_frames, daemon=True)
+        self.writer.start()
+
+    def capture(self):
+        """Copy the current frame for the writer thread to save."""
+        if self.failed:
+            return
+        self.frames += 1
+        try:
+            buffer = self.free.get(block=self.policy == "block")
+        except queue.Empty:
+            self.dropped += 1
+            return
+
+        # The buffer is row-major; pixelcopy fills it through a (width,
+        # height) view without making a new array
+        pygame.pixelcopy.surface_to_array(buffer.transpose(1, 0, 2), self.screen)
+        self.filled.put((self.frames, buffer))
+
+    def _write_frames(self):
+        """Write filled buffers to the file until close() is called.
+
+        After a write fails, buffers are handed back without being written,
+        so a game with the "block" policy never waits on a dead writer.
+        """
+        while True:
+            item = self.filled.get()
+            if item is None:
+                return
+            number, buffer = item
+            if not self.failed:
+                self._write_frame(number, buffer)
+            self.free.put(buffer)
+
+    def _write_frame(self, number, buffer):
+        """Write one frame to the file, and stop capturing if that fails."""
+        data = zlib.compress(buffer, 1) if self.compress else buffer.data.cast("B")
+        try:
+            self.file.write(FRAME.pack(number, len(data)))
+            self.file.write(data)
+        except OSError as error:
+            print(f"Stopped capturing frames: {error}", file=sys.stderr)
+            self.failed = True
+
+    def close(self):
+        """Write the frames still waiting, then stop the thread and close."""
+        self.filled.put(None)
+        self.writer.join()
+        try:
+            self.file.close()
+        except OSError as error:
+            # Flushing the last frames can fail like writing them
+            if not self.failed:
+                print(f"Couldn't finish capturing frames: {error}", file=sys.stderr)
+
+
+def read_frames(path):
+    """Yield (frame number, frame) for each frame saved by FrameCapture.
+
+    Each frame is a (height, width, 3) array of RGB values.
+    """
+    with open(path, "rb") as file:
+        magic, width, height, compressed = HEADER.unpack(file.read(HEADER.size))
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a frame capture")
+        while header := file.read(FRAME.size):
+            number, length = FRAME.unpack(header)
+            data = file.read(length)
+            if compressed:
+                data = zlib.decompress(data)
+            frame = np.frombuffer(data, dtype=np.uint8).reshape(height, width, 3)
+            yield number, frame
@@ -0,0 +1,118 @@
+import numpy as np
+import pygame
+
+# Multiplier that packs a (row, column) cell into a single integer key
+KEY_STRIDE = 1 << 20
+
+
+class SpatialHash:
+    """A uniform grid that narrows down which rects could overlap a query.
+
+    All the rects stored in the grid have the same size. Each one is filed
+    under every cell it touches, and a query only looks at the cells its
+    rects touch, after a quick check against the bounding box of everything
+    in the grid.
+    """
+
+    def __init__(self, cell_width, cell_height):
+        """Initialize an empty grid with cells of the given size."""
+        self.cell_width = cell_width
+        self.cell_height = cell_height
+
+        # Cell keys in sorted order, the index filed under each key, one more
+        # than the largest index, and the bounding box of all the rects
+        self.keys = np.zeros(0, dtype=np.int64)
+        self.indices = np.zeros(0, dtype=np.int64)
+        self.span = 1
+        self.bounds = None
+
+    def build(self, indices, left, top, width, height):
+        """Fill the grid with rects of size width x height.
+
+        indices holds the number each rect is reported as by query(), and left
+        and top hold the position of each rect. The rects can be no bigger
+        than a cell.
+        """
+        if indices.size == 0:
+            self.keys = self.indices = indices
+            self.bounds = None
+            return
+
+        right = left + width
+        bottom = top + height
+        self.bounds = pygame.Rect(
+            int(left.min()),
+            int(top.min()),
+            int(right.max() - left.min()),
+            int(bottom.max() - top.min()),
+        )
+
+        # A rect no bigger than a cell touches at most two cells in each
+        # direction, so file it under all four corners
+        first_column = left // self.cell_width
+        last_column = (right - 1) // self.cell_width
+        first_row = top // self.cell_height
+        last_row = (bottom - 1) // self.cell_height
+        keys = np.concatenate(
+            (
+                first_row * KEY_STRIDE + first_column,
+                first_row * KEY_STRIDE + last_column,
+                last_row * KEY_STRIDE + first_column,
+                last_row * KEY_STRIDE + last_column,
+            )
+        )
+
+        # Sort by key, dropping the duplicates of rects that sit in a single
+        # row or column, by packing each key and index into one number
+        self.span = int(indices.max()) + 1
+        entries = np.unique(keys * self.span + np.tile(indices, 4))
+        self.keys = entries // self.span
+        self.indices = entries % self.span
+
+    def query(self, left, top, width, height):
+        """Find the stored rects that share a cell with each query rect.
+
+        left and top are arrays with the position of each query rect, and the
+        query rects are width x height, no bigger than a cell. Return two
+        arrays pairing the number of a query rect with the index of a stored
+        rect, ordered by query rect; the same pair can be listed twice.
+        """
+        empty = np.zeros(0, dtype=np.int64)
+        if self.bounds is None:
+            return empty, empty
+
+        # Skip the query rects outside the bounding box of the grid
+        right = left + width
+        bottom = top + height
+        bounds = self.bounds
+        queries = np.flatnonzero(
+            (left < bounds.right)
+            & (right > bounds.left)
+            & (top < bounds.bottom)
+            & (bottom > bounds.top)
+        )
+        if queries.size == 0:
+            return empty, empty
+
+        # Each query rect touches the cells under its four corners
+        first_column = left[queries] // self.cell_width
+        last_column = (right[queries] - 1) // self.cell_width
+        first_row = top[queries] // self.cell_height * KEY_STRIDE
+        last_row = (bottom[queries] - 1) // self.cell_height * KEY_STRIDE
+        cells = np.stack(
+            (
+                first_row + first_column,
+                first_row + last_column,
+                last_row + first_column,
+                last_row + last_column,
+            ),
+            axis=1,
+        ).ravel()
+
+        # Look up the stored rects filed under each of those cells
+        starts = np.searchsorted(self.keys, cells, side="left")
+        counts = np.searchsorted(self.keys, cells, side="right") - starts
+        found = np.repeat(starts - np.cumsum(counts) + counts, counts)
+        found += np.arange(found.size)
+        cell_queries = queries.repeat(4)
+        return cell_queries.repeat(counts), self.indices[found]
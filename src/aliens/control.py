@@ -0,0 +1,162 @@
+"""Let other processes play the game over a local socket.
+
+Messages to the server start with a kind and the length of their payload:
+
+- ACTIONS: a batch of action bytes, each a combination of the flags in
+  aliens.actions; they are queued, and one is applied at the start of each
+  frame, in order
+- STATE: ask for the latest state of the game
+- SUBSCRIBE: receive the state of the game after every frame
+
+The server answers with the length of a state followed by the state, a blob
+from AlienInvasion.snapshot() that aliens.snapshot.HEADER describes.
+"""
+
+import asyncio
+import struct
+import threading
+from collections import deque
+
+import pygame
+
+from aliens.actions import FIRE, LEFT, RIGHT, START
+
+# Kind of message and the length of its payload
+REQUEST = struct.Struct("<BH")
+ACTIONS, STATE, SUBSCRIBE = range(1, 4)
+
+# Length of the state that follows
+REPLY = struct.Struct("<I")
+
+# Bytes waiting to go to a subscriber before its updates are skipped
+MAX_BUFFERED = 1 << 20
+
+
+class ControlServer:
+    """A class to serve a game to external agents.
+
+    The server runs an asyncio event loop in a background thread, so the
+    game loop never waits on the network. Actions are handed to the game
+    through a deque, and the game publishes its state once per frame.
+    """
+
+    def __init__(self, address):
+        """Start serving on address, "unix:PATH" or "[HOST:]PORT"."""
+        self.address = address
+
+        # Action bytes received, and the ones held down by agents
+        self.actions = deque()
+        self.held = 0
+
+        # Latest state published by the game, writers subscribed to it, and
+        # writers of every agent connected
+        self.state = b""
+        self.subscribers = set()
+        self.clients = set()
+
+        # Error the server failed to start with, if it did
+        self.error = None
+
+        self.loop = asyncio.new_event_loop()
+        self.ready = threading.Event()
+        self.thread = threading.Thread(target=self._run, daemon=True)
+        self.thread.start()
+        self.ready.wait()
+        if self.error is not None:
+            self.thread.join()
+            self.loop.close()
+            raise self.error
+
+    def _run(self):
+        """Run the event loop of the server thread."""
+        asyncio.set_event_loop(self.loop)
+        try:
+            self.server = self.loop.run_until_complete(self._start())
+        except Exception as error:  # noqa: BLE001 - raised again by __init__
+            self.error = error
+            return
+        finally:
+            self.ready.set()
+        self.loop.run_forever()
+
+    async def _start(self):
+        """Start listening on the address."""
+        if self.address.startswith("unix:"):
+            return await asyncio.start_unix_server(
+                self._serve, self.address.removeprefix("unix:")
+            )
+        host, _, port = self.address.rpartition(":")
+        return await asyncio.start_server(self._serve, host or "127.0.0.1", int(port))
+
+    async def _serve(self, reader, writer):
+        """Answer the messages of one agent until it disconnects."""
+        self.clients.add(writer)
+        try:
+            while True:
+                kind, length = REQUEST.unpack(await reader.readexactly(REQUEST.size))
+                payload = await reader.readexactly(length)
+                if kind == ACTIONS:
+                    self.actions.extend(payload)
+                elif kind == STATE:
+                    writer.write(REPLY.pack(len(self.state)) + self.state)
+                elif kind == SUBSCRIBE:
+                    self.subscribers.add(writer)
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            self.subscribers.discard(writer)
+            self.clients.discard(writer)
+            writer.close()
+
+    def events(self):
+        """Return the next action received as key events.
+
+        Only one action is taken per call, so each action of a batch gets a
+        frame of its own. LEFT and RIGHT are held down until an action
+        without them; FIRE presses space and START presses p.
+        """
+        events = []
+        if self.actions:
+            actions = self.actions.popleft()
+            for flag, key in ((LEFT, pygame.K_LEFT), (RIGHT, pygame.K_RIGHT)):
+                if actions & flag and not self.held & flag:
+                    events.append(pygame.event.Event(pygame.KEYDOWN, key=key))
+                elif self.held & flag and not actions & flag:
+                    events.append(pygame.event.Event(pygame.KEYUP, key=key))
+            self.held = actions & (LEFT | RIGHT)
+            if actions & FIRE:
+                events.append(pygame.event.Event(pygame.KEYDOWN, key=pygame.K_SPACE))
+            if actions & START:
+                events.append(pygame.event.Event(pygame.KEYDOWN, key=pygame.K_p))
+        return events
+
+    def publish(self, state):
+        """Make state the latest state, and send it to the subscribers."""
+        self.state = state
+        if self.subscribers:
+            self.loop.call_soon_threadsafe(self._broadcast, state)
+
+    def _broadcast(self, state):
+        """Send state to every subscriber that is keeping up."""
+        message = REPLY.pack(len(state)) + state
+        for writer in self.subscribers:
+            if writer.transport.get_write_buffer_size() < MAX_BUFFERED:
+                writer.write(message)
+
+    def close(self):
+        """Disconnect the agents, and stop the server and its thread."""
+        asyncio.run_coroutine_threadsafe(self._stop(), self.loop).result()
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join()
+        self.loop.close()
+
+    async def _stop(self):
+        """Stop listening, and end the connection of every agent."""
+        self.server.close()
+        # Closing a connection ends its _serve() task at the next read, so
+        # the tasks finish rather than being cancelled
+        for writer in self.clients:
+            writer.close()
+        tasks = asyncio.all_tasks() - {asyncio.current_task()}
+        await asyncio.gather(*tasks, return_exceptions=True)
+        await self.server.wait_closed()
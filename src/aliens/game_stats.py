@@ -1,7 +1,4 @@
-import os
-from pathlib import Path
-
-HIGH_SCORE_PATH = Path(__file__).parent / "assets" / "score" / "high_score.txt"
+from aliens.leaderboard import default_username
 
 
 class GameStats:
@@ -10,6 +7,8 @@ class GameStats:
     def __init__(self, ai_game):
         """Initialize statistics."""
         self.settings = ai_game.settings
+        self.leaderboard = ai_game.leaderboard
+        self.username = self.settings.username or default_username()
         self.init_stats()
 
         # Start Alien Invasion in an inactive state
@@ -25,21 +24,15 @@ class GameStats:
         self.level = 1
 
     def get_high_score(self):
-        """Retrieve the high score from a file if it exists."""
-        try:
-            with open(HIGH_SCORE_PATH, "r") as file:
-                high_score = int(file.read())
-        except FileNotFoundError:
-            high_score = 0
-
-        return high_score
-
-    def save_high_score(self):
-        """Save the high score to a file."""
-        if HIGH_SCORE_PATH.exists():
-            with open(HIGH_SCORE_PATH, "w") as file:
-                file.write(str(self.high_score))
-        else:
-            os.makedirs(HIGH_SCORE_PATH.parent)
-            with open(HIGH_SCORE_PATH, "x") as file:
-                file.write(str(self.high_score))
+        """Retrieve the best score on the leaderboard, if there is one."""
+        if self.leaderboard is None:
+            return 0
+        return self.leaderboard.high_score()
+
+    def save_score(self):
+        """Add the score of the game just played to the leaderboard.
+
+        The score is written in the background, so this doesn't wait on disk.
+        """
+        if self.leaderboard is not None:
+            self.leaderboard.submit(self.username, self.score, self.level)
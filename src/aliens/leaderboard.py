@@ -0,0 +1,170 @@
+"""Keep the scores of every player in a leaderboard.
+
+Scores are stored in an SQLite database in the player's data folder, not in
+the package, so every game on the machine shares one leaderboard. Run
+
+    python -m aliens.leaderboard [--top 10] [--user NAME]
+
+to print the best scores.
+"""
+
+import argparse
+import getpass
+import os
+import queue
+import sqlite3
+import sys
+import threading
+import time
+from pathlib import Path
+
+from aliens.assets import ASSETS_DIR, data_dir
+
+# Where the high score was kept before the leaderboard
+OLD_HIGH_SCORE_PATH = ASSETS_DIR / "score" / "high_score.txt"
+
+# Statements that create the database; the indexes keep top-N queries cheap
+SCHEMA = (
+    """CREATE TABLE scores (
+        id INTEGER PRIMARY KEY,
+        username TEXT NOT NULL,
+        score INTEGER NOT NULL,
+        level INTEGER,
+        played_at REAL NOT NULL
+    )""",
+    "CREATE INDEX scores_by_score ON scores (score DESC)",
+    "CREATE INDEX scores_by_user ON scores (username, score DESC)",
+    "PRAGMA user_version = 1",
+)
+
+INSERT = "INSERT INTO scores (username, score, level, played_at) VALUES (?, ?, ?, ?)"
+
+
+def default_username():
+    """Return ALIENS_USER, or the name of the user logged in."""
+    try:
+        return os.environ.get("ALIENS_USER") or getpass.getuser()
+    except (KeyError, OSError):
+        return "player"
+
+
+class Leaderboard:
+    """A class to store scores without holding up the game.
+
+    Scores are handed to a writer thread through a queue, and each batch of
+    waiting scores is committed in one transaction. The database runs in
+    WAL mode, so games reading the leaderboard and games writing to it at
+    the same time don't wait on each other, and no game overwrites another's
+    scores.
+    """
+
+    def __init__(self, path=None):
+        """Open the leaderboard at path, creating it if needed."""
+        self.path = Path(path) if path is not None else data_dir() / "leaderboard.db"
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.connection = self._connect()
+
+        # Lock the database first, in case another game is creating it too
+        with self.connection:
+            self.connection.execute("BEGIN IMMEDIATE")
+            if self.connection.execute("PRAGMA user_version").fetchone()[0] == 0:
+                for statement in SCHEMA:
+                    self.connection.execute(statement)
+                self._import_old_high_score()
+
+        # Scores waiting to be written, as rows of the scores table
+        self.pending = queue.Queue()
+        self.writer = threading.Thread(target=self._write_scores, daemon=True)
+        self.writer.start()
+
+    def _connect(self):
+        """Open a connection to the database, in WAL mode."""
+        connection = sqlite3.connect(self.path, timeout=5.0)
+        connection.execute("PRAGMA journal_mode = WAL")
+        return connection
+
+    def _import_old_high_score(self):
+        """Keep the high score from the file used before the leaderboard."""
+        try:
+            score = int(OLD_HIGH_SCORE_PATH.read_text())
+        except (FileNotFoundError, ValueError):
+            return
+        self.connection.execute(
+            INSERT,
+            (default_username(), score, None, OLD_HIGH_SCORE_PATH.stat().st_mtime),
+        )
+
+    def submit(self, username, score, level):
+        """Add a score to the leaderboard in the background."""
+        self.pending.put((username, score, level, time.time()))
+
+    def _write_scores(self):
+        """Write scores as they're submitted, until close() is called."""
+        connection = self._connect()
+        stopping = False
+        while not stopping:
+            rows = [self.pending.get()]
+            while not self.pending.empty():
+                rows.append(self.pending.get())
+            stopping = None in rows
+            rows = [row for row in rows if row is not None]
+            if not rows:
+                continue
+            try:
+                with connection:
+                    connection.executemany(INSERT, rows)
+            except sqlite3.Error as error:
+                print(f"Couldn't save {len(rows)} scores: {error}", file=sys.stderr)
+        connection.close()
+
+    def high_score(self):
+        """Return the best score on the leaderboard, or 0 if there are none."""
+        row = self.connection.execute("SELECT max(score) FROM scores").fetchone()
+        return row[0] or 0
+
+    def top(self, n=10, username=None):
+        """Return the n best (username, score, level, played_at) rows.
+
+        Pass username to only return that player's scores.
+        """
+        if username is None:
+            return self.connection.execute(
+                "SELECT username, score, level, played_at FROM scores"
+                " ORDER BY score DESC LIMIT ?",
+                (n,),
+            ).fetchall()
+        return self.connection.execute(
+            "SELECT username, score, level, played_at FROM scores"
+            " WHERE username = ? ORDER BY score DESC LIMIT ?",
+            (username, n),
+        ).fetchall()
+
+    def close(self):
+        """Write the scores still waiting, then stop the thread and close."""
+        self.pending.put(None)
+        self.writer.join()
+        self.connection.close()
+
+
+def main(argv=None):
+    """Print the best scores on the leaderboard."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--top", type=int, default=10, help="scores to show")
+    parser.add_argument("--user", help="only show this player's scores")
+    parser.add_argument("--path", help="leaderboard database to read")
+    args = parser.parse_args(argv)
+
+    leaderboard = Leaderboard(args.path)
+    try:
+        rows = leaderboard.top(args.top, args.user)
+    finally:
+        leaderboard.close()
+    for rank, (username, score, level, played_at) in enumerate(rows, 1):
+        played = time.strftime("%Y-%m-%d %H:%M", time.localtime(played_at))
+        level = "-" if level is None else level
+        print(f"{rank:>3}. {username:<16}{score:>12,}  level {level:<4}{played}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
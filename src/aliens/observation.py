@@ -0,0 +1,117 @@
+import numpy as np
+
+# Gray levels of each kind of object in a grayscale observation
+BULLET_LEVEL = 85
+SHIP_LEVEL = 170
+ALIEN_LEVEL = 255
+
+# Planes of a channel observation
+SHIP_PLANE, BULLET_PLANE, ALIEN_PLANE = range(3)
+
+
+class ObservationRenderer:
+    """A class to draw a game into a small grid for bots.
+
+    The ship, bullets, and aliens are rasterized straight from their
+    positions into a preallocated NumPy array, without drawing the screen
+    or needing a display. A grayscale observation is a (height, width)
+    array of uint8; a channel observation has a plane per kind of object,
+    holding 255 where that kind of object is.
+    """
+
+    def __init__(self, ai_game, size=(84, 84), channels=False):
+        """Initialize the renderer for a grid of size (width, height)."""
+        self.ai_game = ai_game
+        self.width, self.height = size
+        self.channels = channels
+        screen_rect = ai_game.screen.get_rect()
+        self.screen_width = screen_rect.width
+        self.screen_height = screen_rect.height
+
+        # The frame returned by render(), filled in place every time
+        if channels:
+            self.frame = np.zeros((3, self.height, self.width), dtype=np.uint8)
+        else:
+            self.frame = np.zeros((self.height, self.width), dtype=np.uint8)
+
+    @staticmethod
+    def _cells(start, length, cells, screen_length):
+        """Return the first and last of cells covering start to start + length.
+
+        start is a position on a screen screen_length pixels across, which is
+        divided into cells; the result is clipped to the grid.
+        """
+        first = start * cells // screen_length
+        last = -(-(start + length) * cells // screen_length) - 1
+        first = np.minimum(np.maximum(first, 0), cells - 1)
+        last = np.minimum(np.maximum(last, first), cells - 1)
+        return first, last
+
+    def _fill(self, plane, left, top, width, height, value):
+        """Fill the cells covered by width x height rects at left and top.
+
+        The rects all have the same size, so each one covers at most the same
+        number of cells. Indices past the end of a rect repeat its last cell.
+        """
+        if left.size == 0:
+            return
+        first_column, last_column = self._cells(
+            left, width, self.width, self.screen_width
+        )
+        first_row, last_row = self._cells(top, height, self.height, self.screen_height)
+        span_x = int((last_column - first_column).max()) + 1
+        span_y = int((last_row - first_row).max()) + 1
+        columns = np.minimum(
+            first_column[:, None] + np.arange(span_x), last_column[:, None]
+        )
+        rows = np.minimum(first_row[:, None] + np.arange(span_y), last_row[:, None])
+        plane[rows[:, :, None], columns[:, None, :]] = value
+
+    def render(self):
+        """Draw the current state of the game and return the frame.
+
+        The same array is returned every time, so copy it to keep a frame.
+        """
+        game = self.ai_game
+        ship = game.ship.rect
+        bullets = game.bullets
+        fleet = game.aliens
+        alive = fleet.alive
+
+        self.frame.fill(0)
+        if self.channels:
+            planes = self.frame
+            values = (255, 255, 255)
+        else:
+            planes = (self.frame,) * 3
+            values = (SHIP_LEVEL, BULLET_LEVEL, ALIEN_LEVEL)
+
+        # Draw in the same order as the screen: bullets, ship, then aliens
+        self._fill(
+            planes[BULLET_PLANE],
+            bullets.left[: bullets.count],
+            bullets.top[: bullets.count],
+            bullets.width,
+            bullets.height,
+            values[BULLET_PLANE],
+        )
+
+        first_column, last_column = self._cells(
+            ship.x, ship.width, self.width, self.screen_width
+        )
+        first_row, last_row = self._cells(
+            ship.y, ship.height, self.height, self.screen_height
+        )
+        planes[SHIP_PLANE][first_row : last_row + 1, first_column : last_column + 1] = (
+            values[SHIP_PLANE]
+        )
+
+        self._fill(
+            planes[ALIEN_PLANE],
+            fleet.left[alive],
+            fleet.top[alive],
+            fleet.width,
+            fleet.height,
+            values[ALIEN_PLANE],
+        )
+        return self.frame
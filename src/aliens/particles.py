@@ -0,0 +1,167 @@
+import numpy as np
+import pygame
+
+# Fastest a particle starts out, and how much it speeds up downwards each
+# tick, in pixels per tick
+MAX_SPEED = 4.0
+GRAVITY = 0.12
+
+# Shades a particle goes through as it fades into the background
+SHADES = 4
+
+
+class ParticleSystem:
+    """A class to animate the debris of explosions.
+
+    Particles live in arrays with room for particle_budget of them. Like the
+    bullets of BulletPool, the first count slots hold the live particles,
+    new ones fill the next slots, and dead ones are culled in place, so an
+    explosion never creates objects. Once the budget is used up, further
+    explosions get only the particles that fit. All the particles move in
+    one vectorized step per tick, and are drawn by writing their pixels
+    into the screen through surfarray in one go.
+    """
+
+    def __init__(self, ai_game):
+        """Create an empty particle system.
+
+        Headless games get no room for particles, and neither do 24-bit
+        screens, whose pixels surfarray can't write as integers.
+        """
+        self.ai_game = ai_game
+        self.screen = ai_game.screen
+        self.settings = ai_game.settings
+        capacity = self.settings.particle_budget
+        if ai_game.headless or self.screen.get_bytesize() == 3:
+            capacity = 0
+        self.size = self.settings.particle_size
+        self.lifetime = round(self.settings.particle_lifetime * self.settings.tick_rate)
+
+        # Position, velocity, and ticks left to live of each particle
+        self.x = np.zeros(capacity)
+        self.y = np.zeros(capacity)
+        self.vx = np.zeros(capacity)
+        self.vy = np.zeros(capacity)
+        self.life = np.zeros(capacity, dtype=np.int64)
+        self.count = 0
+
+        # Counter the random numbers of the next explosion are made from
+        self.seed = 0
+
+        theme = ai_game.theme
+        self.set_colors(theme.colors.get("explosion", theme.colors["bullet"]))
+
+    def set_colors(self, color):
+        """Work out the screen pixel of each shade, fading from color into
+        the background.
+        """
+        background = np.array(self.settings.bg_color)
+        self.colors = np.array(
+            [
+                self.screen.map_rgb(
+                    (background + (np.array(color) - background) * mix).round().tolist()
+                )
+                for mix in np.arange(1, SHADES + 1) / SHADES
+            ]
+        )
+
+    def _random(self, n):
+        """Return n pseudo-random numbers from 0 to 1.
+
+        They are a hash of a running counter, like the noise of aliens.sound,
+        so numpy.random is never imported.
+        """
+        x = np.sin(np.arange(self.seed, self.seed + n) * 12.9898) * 43758.5453
+        self.seed = (self.seed + n) % 1_000_003
+        return x - np.floor(x)
+
+    def explode(self, left, top, width, height, particles):
+        """Scatter particles from each of a set of width x height rects.
+
+        left and top are arrays with the position of each rect.
+        """
+        n = min(left.size * particles, self.x.size - self.count)
+        if n <= 0:
+            return
+        start, end = self.count, self.count + n
+        origin = np.repeat(np.arange(left.size), particles)[:n]
+        spread_x, spread_y, angle, speed, life = self._random(5 * n).reshape(5, n)
+
+        self.x[start:end] = left[origin] + spread_x * width
+        self.y[start:end] = top[origin] + spread_y * height
+        angle *= 2 * np.pi
+        speed *= MAX_SPEED
+        self.vx[start:end] = np.cos(angle) * speed
+        self.vy[start:end] = np.sin(angle) * speed
+        self.life[start:end] = np.ceil(self.lifetime * (0.5 + 0.5 * life))
+        self.count = end
+
+    def update(self):
+        """Move every particle, and cull the ones that burnt out."""
+        if not self.count:
+            return
+        n = self.count
+        self.x[:n] += self.vx[:n]
+        self.y[:n] += self.vy[:n]
+        self.vy[:n] += GRAVITY
+        self.life[:n] -= 1
+        alive = self.life[:n] > 0
+        if not alive.all():
+            self._keep(alive)
+
+    def _keep(self, keep):
+        """Keep only the particles where keep is True."""
+        count = self.count
+        self.count = int(np.count_nonzero(keep))
+        for array in (self.x, self.y, self.vx, self.vy, self.life):
+            array[: self.count] = array[:count][keep]
+
+    def bounding_rect(self):
+        """Return a rect around the live particles, or None if there are none."""
+        if not self.count:
+            return None
+        x = self.x[: self.count]
+        y = self.y[: self.count]
+        left = int(x.min())
+        top = int(y.min())
+        return pygame.Rect(
+            left, top, int(x.max()) - left + self.size, int(y.max()) - top + self.size
+        )
+
+    def draw(self):
+        """Draw the live particles inside the screen's clip area, each in the
+        shade for its age.
+        """
+        if not self.count:
+            return
+        n = self.count
+        left = self.x[:n].astype(np.int64)
+        top = self.y[:n].astype(np.int64)
+        colors = self.colors[self.life[:n] * SHADES // (self.lifetime + 1)]
+
+        # Writing pixels directly ignores the clip area, so when particles
+        # stick out of it only the pixels inside it are written
+        clip = self.screen.get_clip()
+        right = left + self.size
+        bottom = top + self.size
+        shown = (left < clip.right) & (right > clip.left)
+        shown &= (top < clip.bottom) & (bottom > clip.top)
+        whole = (left >= clip.left) & (right <= clip.right)
+        whole &= (top >= clip.top) & (bottom <= clip.bottom)
+
+        # Later particles cover earlier ones, so all the particles are
+        # written in order whatever the clip area, and a frame redrawn in
+        # pieces matches one drawn whole
+        offsets = np.arange(self.size)
+        shape = (np.count_nonzero(shown), self.size, self.size)
+        x = np.broadcast_to(left[shown][:, None, None] + offsets[:, None], shape)
+        y = np.broadcast_to(top[shown][:, None, None] + offsets, shape)
+        colors = np.broadcast_to(colors[shown][:, None, None], shape)
+        pixels = pygame.surfarray.pixels2d(self.screen)
+        if np.array_equal(shown, whole):
+            pixels[x, y] = colors
+        else:
+            inside = (x >= clip.left) & (x < clip.right)
+            inside &= (y >= clip.top) & (y < clip.bottom)
+            pixels[x[inside], y[inside]] = colors[inside]
+        del pixels  # unlock the screen
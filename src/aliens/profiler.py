@@ -0,0 +1,177 @@
+import os
+from pathlib import Path
+from time import perf_counter
+
+import numpy as np
+import pygame
+
+from aliens.colors import BLUE, WHITE
+from aliens.text import get_text_cache
+
+# Phases of a frame, in the order they happen
+EVENTS, SHIP, BULLETS, COLLISIONS, ALIENS, PARTICLES, SCREEN, WAIT = range(8)
+PHASE_NAMES = (
+    "events",
+    "ship",
+    "bullets",
+    "collisions",
+    "aliens",
+    "particles",
+    "screen",
+    "wait",
+)
+
+# The histogram is written here when the game quits
+PROFILE_PATH = Path("aliens_profile.txt")
+
+# Upper edges of the histogram bins, in milliseconds
+HISTOGRAM_BINS = (0.1, 0.25, 0.5, 1, 2, 4, 8, 16, 33, 66, float("inf"))
+
+
+class FrameProfiler:
+    """A class to time each phase of a frame.
+
+    The game calls mark() at the end of each phase, which adds the time since
+    the previous mark to that phase. Timings of the last frames are kept in a
+    fixed-size ring buffer. Profiling starts when the ALIENS_PROFILE
+    environment variable is set, and F3 turns it on and off while playing;
+    while it is off, mark() returns straight away.
+    """
+
+    def __init__(self, ai_game, frames=600, refresh=15):
+        """Initialize an empty ring buffer for the given number of frames.
+
+        The overlay is rendered again every refresh frames.
+        """
+        self.screen = ai_game.screen
+        self.settings = ai_game.settings
+        self.enabled = bool(os.environ.get("ALIENS_PROFILE"))
+        self.refresh = refresh
+
+        # Milliseconds spent in each phase of the last frames, and how many
+        # frames have been recorded in total
+        self.samples = np.zeros((frames, len(PHASE_NAMES)))
+        self.recorded = 0
+
+        # Seconds spent in each phase of the frame being timed
+        self.current = [0.0] * len(PHASE_NAMES)
+        self.last_mark = None
+
+        # Overlay with the latest timings
+        self.text_color = BLUE
+        self.bg_color = WHITE
+        self.text = get_text_cache(20)
+        self.image = None
+        self.rect = pygame.Rect(10, 70, 0, 0)
+
+        # Seconds from creating the game to its first frame, once it's drawn
+        self.startup_time = None
+
+    def toggle(self):
+        """Turn profiling on or off."""
+        self.enabled = not self.enabled
+        self.last_mark = None
+
+    def start_frame(self):
+        """Record the frame that just ended, and start timing a new one."""
+        if not self.enabled:
+            return
+        now = perf_counter()
+        if self.last_mark is not None:
+            slot = self.recorded % len(self.samples)
+            self.samples[slot] = self.current
+            self.samples[slot] *= 1000
+            self.recorded += 1
+            if self.recorded % self.refresh == 0:
+                self._prep_overlay()
+        self.current = [0.0] * len(PHASE_NAMES)
+        self.last_mark = now
+
+    def mark(self, phase):
+        """Add the time since the previous mark to phase."""
+        if self.last_mark is None:
+            return
+        now = perf_counter()
+        self.current[phase] += now - self.last_mark
+        self.last_mark = now
+
+    def _recent(self):
+        """Return the timings of the frames in the ring buffer."""
+        return self.samples[: min(self.recorded, len(self.samples))]
+
+    def percentiles(self):
+        """Return p50, p95, and p99 of each phase and of the whole frame.
+
+        The result has a row per percentile and a column per phase, with the
+        whole frame in the last column.
+        """
+        recent = self._recent()
+        totals = recent.sum(axis=1, keepdims=True)
+        return np.percentile(np.hstack((recent, totals)), [50, 95, 99], axis=0)
+
+    def _prep_overlay(self):
+        """Render the percentiles and a sparkline of frame times."""
+        percentiles = self.percentiles()
+        colors = (self.text_color, self.bg_color)
+        lines = [self.text.render("phase        p50    p95    p99 ms", *colors)]
+        for column, name in enumerate(PHASE_NAMES + ("frame",)):
+            # Labels come from the string cache and numbers from glyphs
+            values = " ".join(f"{value:6.2f}" for value in percentiles[:, column])
+            lines.append(self.text.render_number(f"{name:<11}", values, *colors))
+
+        width = max(line.get_width() for line in lines) + 10
+        line_height = max(line.get_height() for line in lines)
+        spark_height = 40
+        self.image = pygame.Surface(
+            (width, line_height * len(lines) + spark_height + 15)
+        )
+        self.image.fill(self.bg_color)
+        for number, line in enumerate(lines):
+            self.image.blit(line, (5, 5 + number * line_height))
+
+        # Frame times from oldest to newest, scaled so twice the frame budget
+        # fills the height of the sparkline
+        frames = min(self.recorded, len(self.samples), width - 10)
+        order = np.arange(self.recorded - frames, self.recorded) % len(self.samples)
+        totals = self.samples[order].sum(axis=1)
+        budget = 2000 / self.settings.fps
+        bottom = self.image.get_height() - 5
+        heights = np.minimum(totals / budget, 1) * spark_height
+        points = list(zip(range(5, 5 + frames), (bottom - heights).tolist()))
+        if len(points) > 1:
+            pygame.draw.lines(self.image, self.text_color, False, points)
+
+        self.rect.size = self.image.get_size()
+
+    def draw(self):
+        """Draw the overlay to the screen, if profiling is on."""
+        if self.enabled and self.image is not None:
+            self.screen.blit(self.image, self.rect)
+
+    def histogram(self):
+        """Return a text histogram of the time spent in each phase."""
+        recent = self._recent()
+        columns = np.hstack((recent, recent.sum(axis=1, keepdims=True)))
+        names = PHASE_NAMES + ("frame",)
+        lines = [f"{len(recent)} frames, times in ms"]
+        if self.startup_time is not None:
+            lines.insert(0, f"first frame after {self.startup_time * 1000:.1f} ms")
+        lines.append("up to".rjust(8) + "".join(f"{name:>11}" for name in names))
+
+        # Count the frames in each bin, from just above the previous edge up
+        # to and including the bin's own edge
+        bins = np.searchsorted(HISTOGRAM_BINS, columns)
+        for number, edge in enumerate(HISTOGRAM_BINS):
+            counts = (bins == number).sum(axis=0)
+            label = "more" if edge == float("inf") else f"{edge:g}"
+            lines.append(label.rjust(8) + "".join(f"{n:>11}" for n in counts))
+
+        for name, row in zip(("p50", "p95", "p99"), self.percentiles()):
+            lines.append(name.rjust(8) + "".join(f"{v:>11.3f}" for v in row))
+        return "\n".join(lines) + "\n"
+
+    def dump(self):
+        """Write the histogram to PROFILE_PATH, if any frames were recorded."""
+        if self.recorded:
+            with open(PROFILE_PATH, "w") as file:
+                file.write(self.histogram())
@@ -0,0 +1,180 @@
+import numpy as np
+import pygame
+
+
+class DirtyRenderer:
+    """A class to redraw only the parts of the screen that changed.
+
+    Every frame the renderer lists what is on the screen and compares it with
+    the previous frame. Areas that something left are filled with the
+    background color, whatever overlaps a changed area is drawn again, clipped
+    to that area, and only the changed areas are pushed to the display.
+
+    Bullets, which can number in the thousands, aren't items: the renderer
+    keeps last frame's bullet positions as arrays and compares them in one
+    go, and only makes rects for the bullets that moved.
+    """
+
+    def __init__(self, ai_game):
+        """Initialize the renderer; the first frame is drawn in full."""
+        self.ai_game = ai_game
+        self.screen = ai_game.screen
+        self.screen_rect = self.screen.get_rect()
+        self.settings = ai_game.settings
+
+        # What was on the screen last frame, by key: (rect, state), and the
+        # position of each bullet
+        self.previous = None
+        self.bullet_left = np.zeros(0, dtype=np.int64)
+        self.bullet_top = np.zeros(0, dtype=np.int64)
+
+    def _items(self):
+        """Return (key, rect, state, draw) for everything on the screen.
+
+        Items are listed in drawing order. state is anything besides the rect
+        whose change means the item has to be drawn again.
+        """
+        game = self.ai_game
+        sb = game.sb
+        items = []
+
+        def add(key, rect, draw, state=None):
+            # Keep rects on the screen; Surface.fill doesn't shrink rects that
+            # stick out above the top edge
+            items.append((key, rect.clip(self.screen_rect), state, draw))
+
+        add("ship", game.ship.rect, game.ship.blitme)
+
+        fleet_rect = game.aliens.bounding_rect()
+        if fleet_rect is not None:
+            # The aliens all move together, so any movement changes these sums
+            fleet_state = (
+                len(game.aliens),
+                int(game.aliens.left.sum()),
+                int(game.aliens.top.sum()),
+            )
+            add("fleet", fleet_rect, self._draw_fleet, fleet_state)
+
+        particles_rect = game.particles.bounding_rect()
+        if particles_rect is not None:
+            # Particles move every tick
+            add("particles", particles_rect, game.particles.draw, game.ticks)
+
+        add("score", sb.score_rect, sb.show_score, sb.score_image)
+        add("high_score", sb.high_score_rect, sb.show_high_score, sb.high_score_image)
+        add("level", sb.level_rect, sb.show_level, sb.level_image)
+        for number, ship in enumerate(sb.ships.sprites()):
+            add(("life", number), ship.rect, ship.blitme)
+
+        if not game.stats.game_active:
+            add("button", game.play_button.rect, game.play_button.draw_button)
+        if game.profiler.enabled and game.profiler.image is not None:
+            profiler = game.profiler
+            add("profiler", profiler.rect, profiler.draw, profiler.image)
+        return items
+
+    def _draw_fleet(self):
+        """Draw the aliens inside the current clip area."""
+        self.ai_game.aliens.draw(self.screen, self.screen.get_clip())
+
+    def _bullet_rects(self, left, top):
+        """Return the rects of bullets at left and top, kept on the screen."""
+        bullets = self.ai_game.bullets
+        right = np.minimum(left + bullets.width, self.screen_rect.right)
+        bottom = np.minimum(top + bullets.height, self.screen_rect.bottom)
+        left = np.maximum(left, 0)
+        top = np.maximum(top, 0)
+        shown = (right > left) & (bottom > top)
+        return [
+            pygame.Rect(x, y, width, height)
+            for x, y, width, height in zip(
+                left[shown].tolist(),
+                top[shown].tolist(),
+                (right - left)[shown].tolist(),
+                (bottom - top)[shown].tolist(),
+            )
+        ]
+
+    def _draw_bullets_in(self, rows, areas):
+        """Draw the bullets numbered in rows inside each of areas."""
+        bullets = self.ai_game.bullets
+        left = bullets.left[rows][:, None]
+        top = bullets.top[rows][:, None]
+        area_left, area_top, area_width, area_height = np.array(areas).T
+        overlapping = (
+            (left < area_left + area_width)
+            & (left + bullets.width > area_left)
+            & (top < area_top + area_height)
+            & (top + bullets.height > area_top)
+        )
+        for index in np.flatnonzero(overlapping.any(axis=0)).tolist():
+            self.screen.set_clip(areas[index])
+            bullets.draw(rows[overlapping[:, index]])
+        self.screen.set_clip(None)
+
+    def update_screen(self):
+        """Redraw what changed since the last frame and update the display."""
+        items = self._items()
+        current = {key: (rect, state) for key, rect, state, _ in items}
+        bullets = self.ai_game.bullets
+        left = bullets.left[: bullets.count].copy()
+        top = bullets.top[: bullets.count].copy()
+        previous_left, previous_top = self.bullet_left, self.bullet_top
+        self.bullet_left, self.bullet_top = left, top
+
+        if self.previous is None:
+            # Nothing has been drawn yet, so draw the whole screen
+            self.screen.fill(self.settings.bg_color)
+            bullets.draw()
+            for _, _, _, draw in items:
+                draw()
+            pygame.display.flip()
+            self.previous = current
+            return
+
+        # Bullets are numbered in the order they were fired, like item keys
+        kept = min(left.size, previous_left.size)
+        moved = (left[:kept] != previous_left[:kept]) | (
+            top[:kept] != previous_top[:kept]
+        )
+        still = np.flatnonzero(~moved)
+        moved = np.flatnonzero(moved)
+        gone = np.concatenate([moved, np.arange(kept, previous_left.size)])
+        drawn = np.concatenate([moved, np.arange(kept, left.size)])
+
+        # Collect the areas items left and the areas they moved to
+        erased = [
+            rect
+            for key, (rect, state) in self.previous.items()
+            if current.get(key) != (rect, state)
+        ]
+        erased += self._bullet_rects(previous_left[gone], previous_top[gone])
+        dirty = erased + [
+            rect
+            for key, (rect, state) in current.items()
+            if self.previous.get(key) != (rect, state)
+        ]
+        dirty += self._bullet_rects(left[drawn], top[drawn])
+        self.previous = current
+        if not dirty:
+            return
+
+        for rect in erased:
+            self.screen.fill(self.settings.bg_color, rect)
+
+        # Bullets are drawn under everything else: the ones that moved in
+        # full, as their new areas are all changed, and the others only
+        # where something was erased
+        bullets.draw(drawn)
+        if still.size and erased:
+            self._draw_bullets_in(still, erased)
+
+        # Draw everything overlapping each changed area, in drawing order, but
+        # only inside that area so nothing ends up on top of a newer item
+        rects = [rect for _, rect, _, _ in items]
+        for area in dirty:
+            self.screen.set_clip(area)
+            for index in area.collidelistall(rects):
+                items[index][3]()
+        self.screen.set_clip(None)
+        pygame.display.update(dirty)
@@ -0,0 +1,233 @@
+"""Record games of Alien Invasion and play them back.
+
+A replay file holds the screen size and settings a game was played with,
+every input event the game handled along with the tick it was handled
+before, and the score and level the game ended on. The game is simulated in
+fixed ticks, so feeding the same events in at the same ticks plays out the
+same game. Run
+
+    python -m aliens.replay record game.air
+    python -m aliens.replay play game.air [--headless]
+
+to record a game, and to watch it again or check it at full speed.
+"""
+
+import argparse
+import json
+import struct
+import sys
+
+import pygame
+
+from aliens.alien_invasion import AlienInvasion
+from aliens.settings import Settings
+
+MAGIC = b"AIRP"
+VERSION = 1
+
+# Magic, version, screen width and height, and length of the settings JSON
+HEADER = struct.Struct("<4sHHHI")
+
+# Tick, kind of record, and two values that depend on the kind
+RECORD = struct.Struct("<IBii")
+KEYDOWN, KEYUP, CLICK, END = range(4)
+
+# Final score and level, following the END record
+RESULT = struct.Struct("<qI")
+
+
+class Replay:
+    """A recorded game: its screen size, settings, events, and result."""
+
+    def __init__(self, screen_size, settings, events, ticks, score, level):
+        """Store a recorded game; events are (tick, kind, a, b) tuples."""
+        self.screen_size = screen_size
+        self.settings = settings
+        self.events = events
+        self.ticks = ticks
+        self.score = score
+        self.level = level
+
+
+class Recorder:
+    """A class to write the input events of a game to a replay file."""
+
+    def __init__(self, path, ai_game):
+        """Open path and write the game's screen size and settings to it."""
+        self.ai_game = ai_game
+        # Written to for the whole game, and closed by close()
+        self.file = open(path, "wb")  # noqa: SIM115
+
+        settings = vars(ai_game.settings).copy()
+        del settings["overrides"]
+        settings = json.dumps(settings).encode()
+        width, height = ai_game.screen.get_size()
+        self.file.write(HEADER.pack(MAGIC, VERSION, width, height, len(settings)))
+        self.file.write(settings)
+
+    def record(self, tick, event):
+        """Write event to the file if it's one the game responds to.
+
+        Quitting isn't recorded; close() marks the end of the game instead.
+        """
+        if event.type == pygame.KEYDOWN and event.key != pygame.K_q:
+            self.file.write(RECORD.pack(tick, KEYDOWN, event.key, 0))
+        elif event.type == pygame.KEYUP:
+            self.file.write(RECORD.pack(tick, KEYUP, event.key, 0))
+        elif event.type == pygame.MOUSEBUTTONDOWN:
+            self.file.write(RECORD.pack(tick, CLICK, *event.pos))
+
+    def close(self):
+        """Write the result of the game and close the file."""
+        stats = self.ai_game.stats
+        self.file.write(RECORD.pack(self.ai_game.ticks, END, 0, 0))
+        self.file.write(RESULT.pack(stats.score, stats.level))
+        self.file.close()
+
+
+def load(path):
+    """Read the replay file at path and return it as a Replay."""
+    with open(path, "rb") as file:
+        data = file.read()
+
+    magic, version, width, height, length = HEADER.unpack_from(data)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError(f"{path} is not a version {VERSION} replay file")
+    offset = HEADER.size
+    settings = json.loads(data[offset : offset + length])
+    offset += length
+
+    # JSON turns the color tuples into lists
+    settings = {
+        name: tuple(value) if isinstance(value, list) else value
+        for name, value in settings.items()
+    }
+
+    events = []
+    while offset + RECORD.size <= len(data):
+        tick, kind, a, b = RECORD.unpack_from(data, offset)
+        offset += RECORD.size
+        if kind == END:
+            score, level = RESULT.unpack_from(data, offset)
+            return Replay((width, height), settings, events, tick, score, level)
+        events.append((tick, kind, a, b))
+    raise ValueError(f"{path} ends before the end of the game")
+
+
+def _dispatch(ai_game, kind, a, b):
+    """Send a recorded event to the game's event handlers."""
+    if kind == KEYDOWN:
+        ai_game._handle_keydown_events(pygame.event.Event(pygame.KEYDOWN, key=a))
+    elif kind == KEYUP:
+        ai_game._handle_keyup_events(pygame.event.Event(pygame.KEYUP, key=a))
+    elif kind == CLICK:
+        event = pygame.event.Event(pygame.MOUSEBUTTONDOWN, pos=(a, b), button=1)
+        ai_game._handle_mouse_events(event)
+
+
+def _watching():
+    """Return False once the window has been closed or q pressed."""
+    for event in pygame.event.get():
+        if event.type == pygame.QUIT:
+            return False
+        if event.type == pygame.KEYDOWN and event.key == pygame.K_q:
+            return False
+    return True
+
+
+def play(replay, headless=False):
+    """Play replay back and return the game.
+
+    Headless games are simulated as fast as possible. Otherwise the game is
+    drawn after every tick, at the tick rate it was recorded at, until the
+    end of the replay or until the window is closed.
+    """
+    # A replayed game never counts towards the leaderboard or telemetry
+    ai_game = AlienInvasion(
+        replay.screen_size, headless, Settings(**replay.settings), record_scores=False
+    )
+
+    events = iter(replay.events)
+    event = next(events, None)
+    while ai_game.ticks < replay.ticks:
+        while event is not None and event[0] == ai_game.ticks:
+            _dispatch(ai_game, *event[1:])
+            event = next(events, None)
+        ai_game._update_objects()
+
+        if not headless:
+            if not _watching():
+                break
+            ai_game._update_screen()
+            ai_game.clock.tick(ai_game.settings.tick_rate)
+    return ai_game
+
+
+def verify(replay):
+    """Play replay back at full speed and check it ends as recorded.
+
+    Return the game, and whether its score and level match the recording.
+    """
+    ai_game = play(replay, headless=True)
+    result = (ai_game.stats.score, ai_game.stats.level)
+    return ai_game, result == (replay.score, replay.level)
+
+
+def record(path, screen_size=None):
+    """Play a game of Alien Invasion and record it to path."""
+    ai_game = AlienInvasion(screen_size)
+    ai_game.recorder = Recorder(path, ai_game)
+    try:
+        ai_game.run_game()
+    finally:
+        ai_game.recorder.close()
+
+
+def parse_size(text):
+    """Parse a screen size written as WIDTHxHEIGHT."""
+    width, height = text.lower().split("x")
+    return int(width), int(height)
+
+
+def main(argv=None):
+    """Record or play back games from the command line."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    record_parser = commands.add_parser("record", help="play and record a game")
+    record_parser.add_argument("path")
+    record_parser.add_argument(
+        "--size",
+        type=parse_size,
+        help="window size as WIDTHxHEIGHT (default: fullscreen)",
+    )
+
+    play_parser = commands.add_parser("play", help="play back a recorded game")
+    play_parser.add_argument("path")
+    play_parser.add_argument(
+        "--headless",
+        action="store_true",
+        help="simulate at full speed without drawing, and check the result",
+    )
+    args = parser.parse_args(argv)
+
+    if args.command == "record":
+        record(args.path, args.size)
+        return 0
+
+    replay = load(args.path)
+    if not args.headless:
+        play(replay)
+        return 0
+
+    ai_game, matches = verify(replay)
+    stats = ai_game.stats
+    print(f"{replay.ticks} ticks, score {stats.score}, level {stats.level}")
+    if not matches:
+        print(f"Doesn't match the recorded score {replay.score}, level {replay.level}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,12 +1,15 @@
-import pygame.font
 from pygame.sprite import Group
 
-from aliens.colors import BLUE
 from aliens.ship import Ship
+from aliens.text import get_text_cache
 
 
 class Scoreboard:
-    """A class to report scoring information."""
+    """A class to report scoring information.
+
+    The prep methods only note which values changed; prep_images() renders
+    them once per frame, so several changes in one frame cost a single render.
+    """
 
     def __init__(self, ai_game):
         """Initialize scorekeeping attributes."""
@@ -17,20 +20,39 @@ class Scoreboard:
         self.stats = ai_game.stats
 
         # Font settings for scoring information
-        self.text_color = BLUE
-        self.font = pygame.font.SysFont(None, 32)
+        self.text_color = ai_game.theme.colors["text"]
+        self.text = get_text_cache(32, ai_game.theme.font)
+
+        # Images that need to be rendered again
+        self.outdated = set()
 
         # Prepare the initial game stats
         self.prep_score()
         self.prep_high_score()
         self.prep_level()
         self.prep_ships()
+        self.prep_images()
+
+    def prep_images(self):
+        """Render the images whose values changed since they were last drawn."""
+        # The score goes first; the other images are positioned relative to it
+        if "score" in self.outdated:
+            self._render_score()
+        if "high_score" in self.outdated:
+            self._render_high_score()
+        if "level" in self.outdated:
+            self._render_level()
+        self.outdated.clear()
 
     def prep_score(self):
+        """Turn the score into a rendered image before the next frame."""
+        self.outdated.add("score")
+
+    def _render_score(self):
         """Turn the score into a rendered image."""
         score_str = str(self.stats.score)
-        self.score_image = self.font.render(
-            f"Score: {score_str}", True, self.text_color, self.settings.bg_color
+        self.score_image = self.text.render_number(
+            "Score: ", score_str, self.text_color, self.settings.bg_color
         )
 
         # Display the score at the top right of the screen
@@ -43,14 +65,15 @@ class Scoreboard:
         self.screen.blit(self.score_image, self.score_rect)
 
     def prep_high_score(self):
+        """Turn the high score into a rendered image before the next frame."""
+        self.outdated.add("high_score")
+
+    def _render_high_score(self):
         """Turn the high score into a rendered image."""
         high_score = round(self.stats.high_score, -1)
         high_score_str = "{:,}".format(high_score)
-        self.high_score_image = self.font.render(
-            f"High Score: {high_score_str}",
-            True,
-            self.text_color,
-            self.settings.bg_color,
+        self.high_score_image = self.text.render_number(
+            "High Score: ", high_score_str, self.text_color, self.settings.bg_color
         )
 
         # Center the high score at the top of the screen
@@ -69,10 +92,14 @@ class Scoreboard:
             self.prep_high_score()
 
     def prep_level(self):
+        """Turn the level into a rendered image before the next frame."""
+        self.outdated.add("level")
+
+    def _render_level(self):
         """Turn the level into a rendered image."""
         level_str = str(self.stats.level)
-        self.level_image = self.font.render(
-            f"Level: {level_str}", True, self.text_color, self.settings.bg_color
+        self.level_image = self.text.render_number(
+            "Level: ", level_str, self.text_color, self.settings.bg_color
         )
 
         # Position the level below the score
@@ -4,18 +4,58 @@ from aliens.colors import LIGHT_GRAY, DARK_GRAY
 class Settings:
     """A class to store all settings for Alien Invasion."""
 
-    def __init__(self):
-        """Initialize the game's static settings."""
-        # Screen settings
+    def __init__(self, **overrides):
+        """Initialize the game's static settings.
+
+        Keyword arguments replace the values of settings by name, such as the
+        settings a recorded game was played with.
+        """
+        self.overrides = overrides
+
+        # Name the player's scores are saved under; None uses ALIENS_USER, or
+        # the name of the user logged in
+        self.username = None
+
+        # Theme pack in assets/themes the game is drawn with
+        self.theme = "classic"
+
+        # Screen settings; the colors are replaced by the theme's palette
         self.screen_width = 1200
         self.screen_height = 800
         self.bg_color = LIGHT_GRAY
 
-        # Frame rate settings
+        # Size of the screen when playing fullscreen, scaled to fit the
+        # display, so the fleet and the pixels drawn each frame are the same
+        # on any monitor; None draws at the display's native resolution
+        self.logical_size = (1280, 720)
+
+        # Frame rate settings; the game is simulated in fixed ticks, and
+        # speeds below are in pixels per tick
         self.fps = 60
+        self.tick_rate = 60
+        self.max_ticks_per_frame = 5
+
+        # Redraw only the parts of the screen that changed each frame
+        self.dirty_rects = False
 
-        # Ship settings
+        # Frame capture settings, used when ALIENS_CAPTURE names a file; when
+        # all the buffers are waiting to be written, "drop" skips frames and
+        # "block" waits for the writer
+        self.capture_buffers = 4
+        self.capture_policy = "drop"
+        self.capture_compress = False
+
+        # Sound settings; effects play on sound_voices reserved channels, and
+        # a smaller mixer buffer plays them sooner but risks crackling
+        self.sound = True
+        self.sound_volume = 0.5
+        self.sound_voices = 4
+        self.sound_buffer = 512
+
+        # Ship settings; every theme's ship is scaled to ship_size
+        self.ship_size = (60, 48)
         self.ship_limit = 3
+        self.hit_pause = 0.5  # seconds
 
         # Bullet settings
         self.bullet_width = 3
@@ -23,11 +63,20 @@ class Settings:
         self.bullet_color = DARK_GRAY
         self.bullets_allowed = 5
 
-        # Alien settings
+        # Alien settings; every theme's alien is scaled to alien_size
+        self.alien_size = (60, 58)
         self.fleet_drop_speed = 10
         self.bottom_margin_multiplier = 6
         self.right_margin_multiplier = 2
 
+        # Explosion settings; no more than particle_budget particles fly at
+        # once, each for up to particle_lifetime seconds
+        self.particle_budget = 2000
+        self.particles_per_alien = 24
+        self.particles_per_ship = 120
+        self.particle_lifetime = 0.6  # seconds
+        self.particle_size = 3
+
         # How quickly the game speeds up
         self.speedup_scale = 1.2
 
@@ -36,15 +85,21 @@ class Settings:
 
         self.initialize_dynamic_settings()
 
+        for name, value in overrides.items():
+            setattr(self, name, value)
+
     def initialize_dynamic_settings(self):
-        """Initialize settings that change throughout the game."""
-        self.ship_speed = 7.5
-        self.bullet_speed = 10.0
-        self.alien_speed = 2.0
-        self.alien_points = 100
+        """Initialize settings that change throughout the game.
+
+        Overridden values of these settings are used as their starting values.
+        """
+        self.ship_speed = self.overrides.get("ship_speed", 7.5)
+        self.bullet_speed = self.overrides.get("bullet_speed", 10.0)
+        self.alien_speed = self.overrides.get("alien_speed", 2.0)
+        self.alien_points = self.overrides.get("alien_points", 100)
 
         # fleet_direction of 1 represents right; -1 represents left
-        self.fleet_direction = 1
+        self.fleet_direction = self.overrides.get("fleet_direction", 1)
 
     def increase_speed(self):
         """Increase speed settings."""
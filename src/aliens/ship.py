@@ -1,10 +1,5 @@
-from pathlib import Path
-
-import pygame
 from pygame.sprite import Sprite
 
-IMAGE_PATH = Path(__file__).parent / "assets" / "images" / "ship.bmp"
-
 
 class Ship(Sprite):
     """A class to manage the ship."""
@@ -16,8 +11,8 @@ class Ship(Sprite):
         self.settings = ai_game.settings
         self.screen_rect = ai_game.screen.get_rect()
 
-        # Load the ship image and get its rect
-        self.image = pygame.image.load(IMAGE_PATH)
+        # Get the theme's ship image and its rect
+        self.image = ai_game.theme.image("ship")
         self.rect = self.image.get_rect()
 
         self.center_ship()
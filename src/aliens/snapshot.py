@@ -0,0 +1,127 @@
+import struct
+
+import numpy as np
+
+# Ticks and pause ticks; ship position and movement flags; dynamic settings;
+# game statistics; and the number of bullets and aliens that follow
+HEADER = struct.Struct("<qqdq??dddqqqqqq?II")
+
+# Arrays that follow the header, in order: (object, attribute, dtype)
+BULLET_ARRAYS = (("left", np.int64), ("y", np.float64), ("top", np.int64))
+FLEET_ARRAYS = (
+    ("x", np.float64),
+    ("left", np.int64),
+    ("top", np.int64),
+    ("alive", np.bool_),
+)
+
+
+def take_snapshot(ai_game):
+    """Return the state of a running game as a compact blob of bytes."""
+    ship = ai_game.ship
+    settings = ai_game.settings
+    stats = ai_game.stats
+    bullets = ai_game.bullets
+    fleet = ai_game.aliens
+
+    parts = [
+        HEADER.pack(
+            ai_game.ticks,
+            ai_game.pause_ticks,
+            ship.x,
+            ship.rect.x,
+            ship.moving_left,
+            ship.moving_right,
+            settings.ship_speed,
+            settings.bullet_speed,
+            settings.alien_speed,
+            settings.alien_points,
+            settings.fleet_direction,
+            stats.score,
+            stats.high_score,
+            stats.level,
+            stats.ships_left,
+            stats.game_active,
+            bullets.count,
+            fleet.alive.size,
+        )
+    ]
+    for name, _ in BULLET_ARRAYS:
+        parts.append(getattr(bullets, name)[: bullets.count].tobytes())
+    for name, _ in FLEET_ARRAYS:
+        parts.append(getattr(fleet, name).tobytes())
+    return b"".join(parts)
+
+
+def restore_snapshot(ai_game, blob):
+    """Put a game back in the state saved by take_snapshot()."""
+    (
+        ai_game.ticks,
+        ai_game.pause_ticks,
+        ship_x,
+        ship_left,
+        moving_left,
+        moving_right,
+        ship_speed,
+        bullet_speed,
+        alien_speed,
+        alien_points,
+        fleet_direction,
+        score,
+        high_score,
+        level,
+        ships_left,
+        game_active,
+        bullet_count,
+        alien_count,
+    ) = HEADER.unpack_from(blob)
+
+    ship = ai_game.ship
+    ship.x = ship_x
+    ship.rect.x = ship_left
+    ship.moving_left = moving_left
+    ship.moving_right = moving_right
+
+    settings = ai_game.settings
+    settings.ship_speed = ship_speed
+    settings.bullet_speed = bullet_speed
+    settings.alien_speed = alien_speed
+    settings.alien_points = alien_points
+    settings.fleet_direction = fleet_direction
+
+    # Only mark the scoreboard images that changed as needing a render
+    stats = ai_game.stats
+    sb = ai_game.sb
+    if stats.score != score:
+        stats.score = score
+        sb.prep_score()
+    if stats.high_score != high_score:
+        stats.high_score = high_score
+        sb.prep_high_score()
+    if stats.level != level:
+        stats.level = level
+        sb.prep_level()
+    if stats.ships_left != ships_left:
+        stats.ships_left = ships_left
+        sb.prep_ships()
+    stats.game_active = game_active
+
+    offset = HEADER.size
+    bullets = ai_game.bullets
+    if bullet_count > bullets.y.size:
+        bullets._grow(bullet_count)
+    for name, dtype in BULLET_ARRAYS:
+        values = np.frombuffer(blob, dtype, bullet_count, offset)
+        getattr(bullets, name)[:bullet_count] = values
+        offset += values.nbytes
+    bullets.count = bullet_count
+
+    fleet = ai_game.aliens
+    for name, dtype in FLEET_ARRAYS:
+        values = np.frombuffer(blob, dtype, alien_count, offset)
+        if getattr(fleet, name).size == alien_count:
+            np.copyto(getattr(fleet, name), values)
+        else:
+            setattr(fleet, name, values.copy())
+        offset += values.nbytes
+    fleet.grid_outdated = True
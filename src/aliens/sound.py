@@ -0,0 +1,103 @@
+import numpy as np
+import pygame
+
+# Sound effects, by their index in SoundEffects.sounds
+SHOT, ALIEN_DESTROYED, SHIP_HIT, LEVEL_UP = range(4)
+
+
+def _tone(rate, seconds, start_hz, end_hz=None, square=False):
+    """Return a tone sweeping from start_hz to end_hz, from -1 to 1."""
+    t = np.arange(int(rate * seconds)) / rate
+    hz = np.linspace(start_hz, start_hz if end_hz is None else end_hz, t.size)
+    wave = np.sin(2 * np.pi * np.cumsum(hz) / rate)
+    return np.sign(wave) if square else wave
+
+
+def _noise(rate, seconds, seed):
+    """Return white noise, from -1 to 1.
+
+    The noise is a hash of the sample numbers; importing numpy.random would
+    take longer than making every effect.
+    """
+    x = np.sin(np.arange(int(rate * seconds)) * 12.9898 + seed) * 43758.5453
+    return (x - np.floor(x)) * 2 - 1
+
+
+def _decay(wave, rate, seconds):
+    """Fade wave out exponentially, losing about 63% every seconds."""
+    return wave * np.exp(-np.arange(wave.size) / (rate * seconds))
+
+
+def synthesize(rate):
+    """Return the waves of the sound effects, indexed like SHOT."""
+    return (
+        _decay(_tone(rate, 0.1, 1400, 300, square=True), rate, 0.04) * 0.3,
+        _decay(_noise(rate, 0.2, 0), rate, 0.05) * 0.5,
+        _decay(_noise(rate, 0.6, 1) * 0.6 + _tone(rate, 0.6, 110, 40) * 0.4, rate, 0.2),
+        np.concatenate([_tone(rate, 0.09, hz) for hz in (523, 659, 784, 1047)]) * 0.3,
+    )
+
+
+class SoundEffects:
+    """A class to play the game's sound effects without stalling a frame.
+
+    Every effect is synthesized into a Sound buffer when the game starts, so
+    playing one never reads from disk or decodes anything. Effects play on
+    a fixed pool of reserved channels: a free channel if there is one, or
+    else the one playing the oldest effect, which is cut off. An effect
+    asked for several times in one tick, such as aliens destroyed by a
+    spread of bullets, only plays once.
+    """
+
+    def __init__(self, ai_game):
+        """Open the mixer and prepare the sound effects, if sound is on."""
+        self.ai_game = ai_game
+        self.settings = ai_game.settings
+        self.enabled = False
+        if ai_game.headless or not self.settings.sound:
+            return
+        try:
+            # A small buffer keeps effects in time with the picture
+            pygame.mixer.init(size=-16, buffer=self.settings.sound_buffer)
+        except pygame.error:
+            return  # no audio device
+        self.enabled = True
+
+        rate, _, channels = pygame.mixer.get_init()
+        self.sounds = []
+        for wave in synthesize(rate):
+            samples = np.round(wave * self.settings.sound_volume * 32767)
+            samples = samples.astype(np.int16)
+            if channels > 1:
+                samples = np.repeat(samples[:, None], channels, axis=1)
+            self.sounds.append(pygame.sndarray.make_sound(samples))
+
+        # Effects only play on the reserved channels
+        voices = self.settings.sound_voices
+        pygame.mixer.set_num_channels(max(voices, pygame.mixer.get_num_channels()))
+        pygame.mixer.set_reserved(voices)
+        self.channels = [pygame.mixer.Channel(number) for number in range(voices)]
+
+        # Tick each channel's effect started on, and each effect last played on
+        self.started = [-1] * voices
+        self.played = [-1] * len(self.sounds)
+
+    def play(self, effect):
+        """Play effect, unless it already started this tick."""
+        if not self.enabled:
+            return
+        ticks = self.ai_game.ticks
+        if self.played[effect] == ticks:
+            return
+        self.played[effect] = ticks
+
+        # Use a free channel, or steal the one that started the longest ago
+        voice = 0
+        for number, channel in enumerate(self.channels):
+            if not channel.get_busy():
+                voice = number
+                break
+            if self.started[number] < self.started[voice]:
+                voice = number
+        self.started[voice] = ticks
+        self.channels[voice].play(self.sounds[effect])
@@ -0,0 +1,301 @@
+"""Log what happens in each game of Alien Invasion for later analysis.
+
+When ALIENS_TELEMETRY names a folder, every game played is saved there as a
+.npz file holding a NumPy array per column:
+
+- event_tick, event_kind, event_a, event_b: one row per event, where the
+  meaning of a and b depends on the kind (see the constants below)
+- frame_tick, frame_ticks, frame_seconds: one row per frame, with the tick
+  it ended on, the ticks simulated in it, and the time since the last frame
+- version, username, settings (as JSON), and started (a Unix time)
+
+Run
+
+    python -m aliens.telemetry FOLDER
+
+to summarize the games saved in a folder.
+"""
+
+import argparse
+import json
+import os
+import queue
+import sys
+import threading
+import time
+from pathlib import Path
+
+import numpy as np
+
+VERSION = 1
+
+# Kinds of event, and what their a and b values hold
+GAME_START = 0  # a: level, b: ships
+FIRED = 1  # a: bullets in flight after the shot
+HIT = 2  # a: aliens destroyed, b: points scored
+SHIP_LOST = 3  # a: ships left before the hit, b: level
+NEW_LEVEL = 4  # a: level reached, b: ticks the previous level took
+GAME_OVER = 5  # a: score, b: level
+QUIT = 6  # a: score, b: level, when the player quits in the middle of a game
+KIND_NAMES = (
+    "game_start",
+    "fired",
+    "hit",
+    "ship_lost",
+    "new_level",
+    "game_over",
+    "quit",
+)
+
+# Columns of each table, and the rows there is room for at first
+EVENT_COLUMNS = (
+    ("event_tick", np.int64),
+    ("event_kind", np.uint8),
+    ("event_a", np.int64),
+    ("event_b", np.int64),
+)
+FRAME_COLUMNS = (
+    ("frame_tick", np.int64),
+    ("frame_ticks", np.uint8),
+    ("frame_seconds", np.float32),
+)
+CAPACITY = 1 << 14
+
+
+class Telemetry:
+    """A class to record events and frame times while a game is played.
+
+    Rows go into preallocated arrays, one per column, which double in size
+    when they fill up, so recording a row is a few array stores. When a game
+    ends its rows are handed to a writer thread, which saves them in bulk
+    as one compressed .npz file; nothing is written while playing.
+    """
+
+    def __init__(self, ai_game):
+        """Prepare to record games, if ALIENS_TELEMETRY names a folder and
+        the game records scores.
+        """
+        self.ai_game = ai_game
+        folder = os.environ.get("ALIENS_TELEMETRY")
+        self.enabled = bool(folder) and ai_game.record_scores
+        self.recording = False
+        # Tick the current level started on
+        self.level_started = 0
+        if not self.enabled:
+            return
+        self.folder = Path(folder)
+        self.folder.mkdir(parents=True, exist_ok=True)
+
+        for name, dtype in EVENT_COLUMNS + FRAME_COLUMNS:
+            setattr(self, name, np.zeros(CAPACITY, dtype=dtype))
+        self.events = 0
+        self.frames = 0
+
+        # Games recorded so far
+        self.games = 0
+
+        # Games waiting to be saved, as (path, columns)
+        self.pending = queue.Queue()
+        self.writer = threading.Thread(target=self._write_games, daemon=True)
+        self.writer.start()
+
+    def start(self):
+        """Start recording a new game."""
+        if not self.enabled:
+            return
+        self.recording = True
+        self.started = time.time()
+        self.events = 0
+        self.frames = 0
+        self.level_started = self.ai_game.ticks
+        stats = self.ai_game.stats
+        self.event(GAME_START, stats.level, stats.ships_left)
+
+    def event(self, kind, a=0, b=0):
+        """Record an event of kind on the current tick."""
+        if not self.recording:
+            return
+        row = self.events
+        if row == self.event_tick.size:
+            self._grow(EVENT_COLUMNS)
+        self.event_tick[row] = self.ai_game.ticks
+        self.event_kind[row] = kind
+        self.event_a[row] = a
+        self.event_b[row] = b
+        self.events = row + 1
+
+    def level_up(self, level):
+        """Record reaching level, and how long the last level took."""
+        if not self.recording:
+            return
+        ticks = self.ai_game.ticks
+        self.event(NEW_LEVEL, level, ticks - self.level_started)
+        self.level_started = ticks
+
+    def frame(self, ticks, seconds):
+        """Record a frame that simulated ticks ticks, seconds after the last."""
+        if not self.recording:
+            return
+        row = self.frames
+        if row == self.frame_tick.size:
+            self._grow(FRAME_COLUMNS)
+        self.frame_tick[row] = self.ai_game.ticks
+        self.frame_ticks[row] = ticks
+        self.frame_seconds[row] = seconds
+        self.frames = row + 1
+
+    def _grow(self, columns):
+        """Double the room in every column of a table."""
+        for name, _ in columns:
+            array = getattr(self, name)
+            grown = np.zeros(2 * array.size, dtype=array.dtype)
+            grown[: array.size] = array
+            setattr(self, name, grown)
+
+    def end(self, kind=GAME_OVER):
+        """Stop recording, and save the game in the background.
+
+        kind is GAME_OVER for a game that was lost, or QUIT for one the
+        player left.
+        """
+        if not self.recording:
+            return
+        stats = self.ai_game.stats
+        self.event(kind, stats.score, stats.level)
+        self.recording = False
+
+        # Copy the rows, so the arrays can be reused by the next game
+        columns = {
+            name: getattr(self, name)[: self.events].copy() for name, _ in EVENT_COLUMNS
+        }
+        columns.update(
+            (name, getattr(self, name)[: self.frames].copy())
+            for name, _ in FRAME_COLUMNS
+        )
+        settings = vars(self.ai_game.settings).copy()
+        settings.pop("overrides")
+        columns.update(
+            version=np.array(VERSION),
+            username=np.array(stats.username),
+            settings=np.array(json.dumps(settings)),
+            started=np.array(self.started),
+        )
+        self.games += 1
+        stamp = time.strftime("%Y%m%d-%H%M%S", time.localtime(self.started))
+        path = self.folder / f"{stamp}-{os.getpid()}-{self.games}.npz"
+        self.pending.put((path, columns))
+
+    def _write_games(self):
+        """Save games as they end, until close() is called."""
+        while True:
+            item = self.pending.get()
+            if item is None:
+                return
+            path, columns = item
+            # Write to a temporary file first, so a loader never reads half
+            temporary = path.with_suffix(".tmp")
+            try:
+                with open(temporary, "wb") as file:
+                    np.savez_compressed(file, **columns)
+                os.replace(temporary, path)
+            except OSError as error:
+                print(f"Couldn't save telemetry to {path}: {error}", file=sys.stderr)
+
+    def close(self):
+        """Save the game being played as quit, then the games waiting, and
+        stop.
+        """
+        if not self.enabled:
+            return
+        self.end(QUIT)
+        self.pending.put(None)
+        self.writer.join()
+
+
+class Session:
+    """A game loaded from a telemetry file.
+
+    Each column of the file is an attribute holding its array, and the
+    settings are a dict.
+    """
+
+    def __init__(self, path):
+        """Load the game saved at path."""
+        self.path = Path(path)
+        with np.load(path) as data:
+            for name in data.files:
+                setattr(self, name, data[name])
+        self.version = int(self.version)
+        self.username = str(self.username)
+        self.settings = json.loads(str(self.settings))
+        self.started = float(self.started)
+
+    def events(self, kind):
+        """Return the ticks, a values, and b values of the events of kind."""
+        rows = self.event_kind == kind
+        return self.event_tick[rows], self.event_a[rows], self.event_b[rows]
+
+    def summary(self):
+        """Return a dict of the main numbers of the game."""
+        # A game ends on either a GAME_OVER or a QUIT event
+        ended = np.isin(self.event_kind, (GAME_OVER, QUIT))
+        score = self.event_a[ended]
+        level = self.event_b[ended]
+        _, _, level_ticks = self.events(NEW_LEVEL)
+        _, aliens, _ = self.events(HIT)
+        shots = int(np.count_nonzero(self.event_kind == FIRED))
+        frame_ms = self.frame_seconds * 1000
+        return {
+            "username": self.username,
+            "score": int(score[-1]) if score.size else None,
+            "level": int(level[-1]) if level.size else None,
+            "quit": bool(np.any(self.event_kind == QUIT)),
+            "ticks": int(self.event_tick[-1] - self.event_tick[0]),
+            "shots": shots,
+            "aliens_destroyed": int(aliens.sum()),
+            "aliens_per_shot": float(aliens.sum() / shots) if shots else 0.0,
+            "ships_lost": int(np.count_nonzero(self.event_kind == SHIP_LOST)),
+            "level_ticks": level_ticks.tolist(),
+            "frame_p50_ms": float(np.percentile(frame_ms, 50)) if frame_ms.size else 0,
+            "frame_p99_ms": float(np.percentile(frame_ms, 99)) if frame_ms.size else 0,
+        }
+
+
+def load(path):
+    """Return the game saved at path as a Session."""
+    return Session(path)
+
+
+def load_all(folder):
+    """Return every game saved in folder as Sessions, oldest first."""
+    sessions = [Session(path) for path in Path(folder).glob("*.npz")]
+    return sorted(sessions, key=lambda session: session.started)
+
+
+def main(argv=None):
+    """Summarize the games saved in a folder from the command line."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("folder", help="folder ALIENS_TELEMETRY named")
+    parser.add_argument("--json", action="store_true", help="print JSON instead")
+    args = parser.parse_args(argv)
+
+    summaries = [session.summary() for session in load_all(args.folder)]
+    if args.json:
+        print(json.dumps(summaries, indent=2))
+        return 0
+    print(
+        f"{'player':<16}{'score':>10}{'level':>7}{'ticks':>9}{'shots':>7}"
+        f"{'hit/shot':>10}{'lost':>6}{'p50 ms':>8}{'p99 ms':>8}"
+    )
+    for summary in summaries:
+        print(
+            f"{summary['username']:<16}{summary['score'] or 0:>10}"
+            f"{summary['level'] or 0:>7}{summary['ticks']:>9}{summary['shots']:>7}"
+            f"{summary['aliens_per_shot']:>10.2f}{summary['ships_lost']:>6}"
+            f"{summary['frame_p50_ms']:>8.1f}{summary['frame_p99_ms']:>8.1f}"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,80 @@
+from collections import OrderedDict
+
+import pygame.font
+
+# Text caches by font file and size, shared by everything that draws text
+_caches = {}
+
+
+def get_text_cache(size, font=None):
+    """Return the shared text cache for a font file at the given size.
+
+    With no font file, the font is the one bundled with pygame. SysFont(None,
+    size) ends up with the same font, but only after scanning the system's
+    fonts.
+    """
+    cache = _caches.get((font, size))
+    if cache is None:
+        cache = _caches[font, size] = TextCache(pygame.font.Font(font, size))
+    return cache
+
+
+class TextCache:
+    """A class to render text without rasterizing the same thing twice.
+
+    Whole strings are kept in a small LRU cache. Numbers are put together from
+    glyphs that are each rendered once, so a changing score costs a few blits
+    instead of a call to the font rasterizer.
+    """
+
+    def __init__(self, font, max_strings=64):
+        """Initialize an empty cache for font."""
+        self.font = font
+        self.max_strings = max_strings
+
+        # Rendered strings and glyphs by (text, color, background)
+        self.strings = OrderedDict()
+        self.glyphs = {}
+
+    def render(self, text, color, background):
+        """Return text rendered in color on background."""
+        key = (text, color, background)
+        image = self.strings.get(key)
+        if image is not None:
+            self.strings.move_to_end(key)
+            return image
+
+        image = self.font.render(text, True, color, background)
+        self.strings[key] = image
+        if len(self.strings) > self.max_strings:
+            self.strings.popitem(last=False)
+        return image
+
+    def _glyph(self, char, color, background):
+        """Return a single character rendered in color on background."""
+        key = (char, color, background)
+        glyph = self.glyphs.get(key)
+        if glyph is None:
+            glyph = self.glyphs[key] = self.font.render(char, True, color, background)
+        return glyph
+
+    def render_number(self, label, number, color, background):
+        """Return label followed by number, where number is a formatted string.
+
+        The label comes from the string cache and the number is built from
+        glyphs, so every value of the number doesn't fill up the cache.
+        """
+        label_image = self.render(label, color, background)
+        glyphs = [self._glyph(char, color, background) for char in number]
+
+        width = label_image.get_width() + sum(glyph.get_width() for glyph in glyphs)
+        height = max([label_image.get_height()] + [g.get_height() for g in glyphs])
+        image = pygame.Surface((width, height))
+        image.fill(background)
+
+        image.blit(label_image, (0, 0))
+        x = label_image.get_width()
+        for glyph in glyphs:
+            image.blit(glyph, (x, 0))
+            x += glyph.get_width()
+        return image
@@ -0,0 +1,163 @@
+import hashlib
+import json
+import os
+import struct
+
+import pygame
+
+from aliens.assets import ASSETS_DIR, data_dir
+
+THEMES_DIR = ASSETS_DIR / "themes"
+
+# Bump to throw away atlases compiled by an older version of this module
+ATLAS_VERSION = 1
+MAGIC = b"AITA"
+
+# Magic, atlas width and height, and length of the JSON describing it; the
+# atlas follows as rows of RGBA bytes
+ATLAS_HEADER = struct.Struct("<4sHHI")
+
+# Compiled themes by name and sprite sizes
+_themes = {}
+
+
+def theme_names():
+    """Return the names of the theme packs, in alphabetical order."""
+    return sorted(path.parent.name for path in THEMES_DIR.glob("*/theme.json"))
+
+
+def get_theme(name, settings, save=True):
+    """Return the theme called name, with sprites of the sizes in settings.
+
+    Each theme is compiled only once, so switching back to it is free. Pass
+    save=False to leave a newly compiled atlas out of the player's data
+    folder.
+    """
+    sizes = {"ship": tuple(settings.ship_size), "alien": tuple(settings.alien_size)}
+    key = (name, tuple(sizes.items()))
+    theme = _themes.get(key)
+    if theme is None:
+        theme = _themes[key] = Theme(name, sizes, save)
+    return theme
+
+
+class Theme:
+    """A theme pack compiled for the game: a palette, a font, and sprites.
+
+    A theme pack is a folder in assets/themes with a theme.json naming its
+    colors, its font file (or null for the default font), and an image for
+    each sprite. Pixels of the "colorkey" color, if one is given, become
+    transparent. The images are scaled to the game's sprite sizes and packed
+    into a single atlas, which is cached in the player's data folder under
+    a hash of everything it was made from, so later launches read it back
+    without decoding or scaling any images. Every sprite is a subsurface of
+    the atlas.
+    """
+
+    def __init__(self, name, sizes, save=True):
+        """Load the theme called name, with sprites of sizes {name: (w, h)}.
+
+        A newly compiled atlas is only cached if save is True.
+        """
+        self.name = name
+        pack = THEMES_DIR / name
+        config_bytes = (pack / "theme.json").read_bytes()
+        config = json.loads(config_bytes)
+        self.title = config.get("title", name)
+        self.colors = {key: tuple(value) for key, value in config["palette"].items()}
+        self.font = str(pack / config["font"]) if config.get("font") else None
+
+        images = {sprite: pack / config["images"][sprite] for sprite in sizes}
+        digest = hashlib.sha256(f"{ATLAS_VERSION} {sorted(sizes.items())}".encode())
+        digest.update(config_bytes)
+        for sprite in sorted(images):
+            digest.update(images[sprite].read_bytes())
+        path = data_dir() / "themes" / f"{digest.hexdigest()}.atlas"
+
+        try:
+            atlas, rects, alpha = _read_atlas(path)
+        except (OSError, ValueError, struct.error):
+            atlas, rects, alpha = _compile_atlas(images, sizes, config.get("colorkey"))
+            if save:
+                _write_atlas(path, atlas, rects, alpha)
+
+        # Convert the atlas to the display's pixel format, so blitting a
+        # sprite doesn't need a conversion every frame
+        if pygame.display.get_surface() is not None:
+            atlas = atlas.convert_alpha() if alpha else atlas.convert()
+        self.atlas = atlas
+        self.sprites = {
+            sprite: atlas.subsurface(pygame.Rect(rect))
+            for sprite, rect in rects.items()
+        }
+
+    def image(self, sprite):
+        """Return the image of sprite, a subsurface of the atlas."""
+        return self.sprites[sprite]
+
+
+def _compile_atlas(images, sizes, colorkey):
+    """Return an atlas of images scaled to sizes, their rects, and whether
+    the atlas has any transparent pixels.
+
+    The sprites are packed side by side in a single row.
+    """
+    alpha = colorkey is not None
+    sprites = {}
+    for sprite, path in images.items():
+        image = pygame.image.load(path)
+        alpha = alpha or bool(image.get_flags() & pygame.SRCALPHA)
+        if colorkey is not None:
+            image.set_colorkey(colorkey)
+
+        # Copy onto a transparent surface, turning the colorkey into alpha
+        copy = pygame.Surface(image.get_size(), pygame.SRCALPHA)
+        copy.blit(image, (0, 0))
+        if copy.get_size() != sizes[sprite]:
+            copy = pygame.transform.smoothscale(copy, sizes[sprite])
+        sprites[sprite] = copy
+
+    width = sum(width for width, _ in sizes.values())
+    height = max(height for _, height in sizes.values())
+    atlas = pygame.Surface((width, height), pygame.SRCALPHA)
+    rects = {}
+    x = 0
+    for sprite, image in sprites.items():
+        # Adding to the empty atlas copies pixels exactly, alpha included
+        atlas.blit(image, (x, 0), special_flags=pygame.BLEND_RGBA_ADD)
+        rects[sprite] = (x, 0, *image.get_size())
+        x += image.get_width()
+    return atlas, rects, alpha
+
+
+def _read_atlas(path):
+    """Return the atlas, sprite rects, and alpha flag saved at path."""
+    with open(path, "rb") as file:
+        data = file.read()
+    magic, width, height, length = ATLAS_HEADER.unpack_from(data)
+    if magic != MAGIC:
+        raise ValueError(f"{path} is not a theme atlas")
+    offset = ATLAS_HEADER.size
+    info = json.loads(data[offset : offset + length])
+    atlas = pygame.image.frombytes(data[offset + length :], (width, height), "RGBA")
+    return atlas, info["rects"], info["alpha"]
+
+
+def _write_atlas(path, atlas, rects, alpha):
+    """Save an atlas to path, if the data folder can be written to.
+
+    The atlas is written to a temporary file first, so a game starting at
+    the same time never reads half of it.
+    """
+    info = json.dumps({"rects": rects, "alpha": alpha}).encode()
+    width, height = atlas.get_size()
+    temporary = path.with_suffix(f".{os.getpid()}.tmp")
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(temporary, "wb") as file:
+            file.write(ATLAS_HEADER.pack(MAGIC, width, height, len(info)))
+            file.write(info)
+            file.write(pygame.image.tobytes(atlas, "RGBA"))
+        os.replace(temporary, path)
+    except OSError:
+        pass
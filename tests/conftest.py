@@ -0,0 +1,9 @@
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def data_dir(tmp_path, monkeypatch):
+    """Keep the leaderboards and theme atlases of tests out of the
+    player's data folder.
+    """
+    monkeypatch.setenv("ALIENS_DATA", str(tmp_path / "data"))
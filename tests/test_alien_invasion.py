@@ -0,0 +1,47 @@
+from aliens.actions import NOOP, START
+from aliens.alien_invasion import AlienInvasion
+
+
+def test_clearing_a_level_without_telemetry(monkeypatch):
+    """A headless game moves on to the next level when its fleet is cleared."""
+    monkeypatch.delenv("ALIENS_TELEMETRY", raising=False)
+    game = AlienInvasion((1200, 800), headless=True)
+    game.step(START)
+    game.aliens.empty()
+    game.step(NOOP)
+    assert game.stats.level == 2
+    assert len(game.aliens) > 0
+
+
+def test_last_ship_is_hit_once(monkeypatch):
+    """An alien reaching the bottom on the ship ends the game only once."""
+    game = AlienInvasion((1200, 800), headless=True)
+    game.step(START)
+    game.stats.ships_left = 0
+    saved = []
+    monkeypatch.setattr(game.stats, "save_score", lambda: saved.append(True))
+
+    # Put an alien on the ship, at the bottom of the screen
+    fleet = game.aliens
+    fleet.left[0] = game.ship.rect.x
+    fleet.top[0] = game.settings.screen_height - fleet.height
+    fleet.grid_outdated = True
+    game._handle_ship_alien_collisions()
+
+    assert not game.stats.game_active
+    assert saved == [True]
+
+
+def test_game_runs_without_a_leaderboard(tmp_path, monkeypatch, capsys):
+    """A game whose data folder can't be created plays without a leaderboard."""
+    monkeypatch.setenv("SDL_VIDEODRIVER", "dummy")
+    monkeypatch.setenv("SDL_AUDIODRIVER", "dummy")
+    not_a_folder = tmp_path / "file"
+    not_a_folder.write_text("")
+    monkeypatch.setenv("ALIENS_DATA", str(not_a_folder / "aliens"))
+
+    game = AlienInvasion((800, 600))
+    game.step(START)
+    assert game.leaderboard is None
+    assert game.stats.game_active
+    assert "Couldn't open the leaderboard" in capsys.readouterr().err
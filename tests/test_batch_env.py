@@ -0,0 +1,15 @@
+from aliens.batch_env import cross_check
+
+
+def test_batch_env_matches_single_games():
+    """BatchEnv plays exactly like the sprite game on the default screen."""
+    assert cross_check(k=8, ticks=3000) == []
+
+
+def test_batch_env_matches_single_games_across_levels():
+    """BatchEnv plays exactly like the sprite game as fleets are cleared.
+
+    A small screen holds only a few aliens, so random play clears fleets and
+    most of the games reach later levels.
+    """
+    assert cross_check(k=8, ticks=3000, screen_size=(800, 500)) == []
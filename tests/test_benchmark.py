@@ -0,0 +1,14 @@
+from pathlib import Path
+
+import aliens
+from aliens.benchmark import measure_startup
+
+
+def test_measure_startup(monkeypatch):
+    """A cold start is timed in a new interpreter, up to the first frame."""
+    # The new interpreter needs to find the package and a video driver
+    monkeypatch.setenv("PYTHONPATH", str(Path(aliens.__file__).parents[1]))
+    monkeypatch.setenv("SDL_VIDEODRIVER", "dummy")
+    monkeypatch.setenv("SDL_AUDIODRIVER", "dummy")
+    startup = measure_startup(runs=1)
+    assert 0 < startup["first_frame_ms"] <= startup["startup_ms"]
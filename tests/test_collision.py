@@ -0,0 +1,63 @@
+import numpy as np
+import pygame
+
+from aliens.alien_invasion import AlienInvasion
+
+
+def _sprites(left, top, width, height):
+    """Return a group with a width x height sprite at each position."""
+    group = pygame.sprite.Group()
+    for x, y in zip(left.tolist(), top.tolist()):
+        sprite = pygame.sprite.Sprite()
+        sprite.rect = pygame.Rect(x, y, width, height)
+        group.add(sprite)
+    return group
+
+
+def test_fleet_hit_matches_groupcollide():
+    """Fleet.hit destroys the aliens and uses up the bullets groupcollide would."""
+    game = AlienInvasion((1200, 800), headless=True)
+    settings = game.settings
+    fleet = game.aliens
+    width, height = settings.bullet_width, settings.bullet_height
+    rng = np.random.default_rng(0)
+
+    for _ in range(500):
+        # Thin out a new fleet, and move it so the grid is shifted or rebuilt
+        fleet.create()
+        fleet.alive &= rng.random(fleet.alive.size) < 0.7
+        fleet.grid_outdated = True
+        for _ in range(rng.integers(0, 60)):
+            fleet.update()
+
+        # Bullets anywhere on the screen, and bullets close to aliens
+        n = rng.integers(1, 20)
+        near = rng.integers(0, fleet.alive.size, n)
+        left = np.where(
+            rng.random(n) < 0.5,
+            rng.integers(0, settings.screen_width, n),
+            fleet.left[near] + rng.integers(-width, fleet.width + 1, n),
+        )
+        top = np.where(
+            rng.random(n) < 0.5,
+            rng.integers(0, settings.screen_height, n),
+            fleet.top[near] + rng.integers(-height, fleet.height + 1, n),
+        )
+
+        alive = np.flatnonzero(fleet.alive)
+        bullets = _sprites(left, top, width, height)
+        aliens = _sprites(
+            fleet.left[alive], fleet.top[alive], fleet.width, fleet.height
+        )
+        numbers = {sprite: number for number, sprite in enumerate(bullets)}
+        indices = dict(zip(aliens, alive.tolist()))
+        collisions = pygame.sprite.groupcollide(bullets, aliens, True, True)
+        expected_hit = np.zeros(n, dtype=bool)
+        expected_hit[[numbers[bullet] for bullet in collisions]] = True
+        expected_aliens = sorted(
+            indices[alien] for hit in collisions.values() for alien in hit
+        )
+
+        hit, destroyed = fleet.hit(left, top, width, height)
+        assert hit.tolist() == expected_hit.tolist()
+        assert sorted(destroyed.tolist()) == expected_aliens
@@ -0,0 +1,39 @@
+import gc
+import logging
+import socket
+import time
+
+import pytest
+
+from aliens.control import ACTIONS, REQUEST, SUBSCRIBE, ControlServer
+
+
+def test_close_disconnects_agents(tmp_path, caplog):
+    """Closing the server ends every agent's connection cleanly."""
+    path = tmp_path / "control.sock"
+    server = ControlServer(f"unix:{path}")
+    agents = [socket.socket(socket.AF_UNIX) for _ in range(2)]
+    for agent in agents:
+        agent.connect(str(path))
+    agents[0].sendall(REQUEST.pack(SUBSCRIBE, 0))
+    agents[1].sendall(REQUEST.pack(ACTIONS, 1) + b"\x04")
+    deadline = time.monotonic() + 5
+    while not (server.subscribers and server.actions) and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+    with caplog.at_level(logging.ERROR, logger="asyncio"):
+        server.close()
+        gc.collect()
+    assert server.loop.is_closed()
+    assert not caplog.records
+    for agent in agents:
+        agent.settimeout(5)
+        assert agent.recv(1) == b""
+        agent.close()
+
+
+@pytest.mark.parametrize("address", ["notaport", "unix:/nonexistent/control.sock"])
+def test_startup_error_is_raised(address):
+    """A server that can't start raises its error instead of hanging."""
+    with pytest.raises((OSError, ValueError)):
+        ControlServer(address)
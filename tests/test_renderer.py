@@ -0,0 +1,30 @@
+import numpy as np
+import pygame
+
+from aliens.actions import FIRE, LEFT, RIGHT, START
+from aliens.alien_invasion import AlienInvasion
+
+
+def test_dirty_frames_match_full_frames(monkeypatch):
+    """Redrawing only what changed gives the same frames as drawing it all."""
+    monkeypatch.setenv("SDL_VIDEODRIVER", "dummy")
+    monkeypatch.setenv("SDL_AUDIODRIVER", "dummy")
+    game = AlienInvasion((1200, 800), record_scores=False)
+    game.settings.dirty_rects = True
+    game.step(START)
+    # Keep many slow bullets in flight; fleets are cleared quickly, so don't
+    # let the game speed up with every level
+    game.settings.bullets_allowed = 200
+    game.settings.bullet_speed = 2.0
+    game.settings.speedup_scale = 1.0
+
+    for tick in range(300):
+        game.step(FIRE | (LEFT if tick // 40 % 2 else RIGHT))
+        game._update_screen()
+        dirty = pygame.surfarray.array2d(game.screen)
+
+        # Draw the same frame in full, then put the dirty one back
+        game._draw_screen()
+        full = pygame.surfarray.array2d(game.screen)
+        pygame.surfarray.blit_array(game.screen, dirty)
+        assert np.array_equal(dirty, full), f"frames differ on tick {tick}"